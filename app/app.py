@@ -1,5 +1,13 @@
-from flask import Flask, render_template, send_from_directory, jsonify
+from flask import Flask, render_template, send_from_directory, jsonify, request, Response, stream_with_context
 from classes.extract import *
+from classes.extract_async import *
+from classes.cache import *
+from classes.jobs import *
+from classes.limiter import *
+from classes.metrics import *
+from classes.results import *
+from classes.transport import *
+import json
 from os import environ
 from functions import *
 
@@ -16,15 +24,130 @@ def extract():
     playlistName = get_arguments('playlistName')
     playlistGenre = get_arguments('playlistGenre')
     playlistURL = get_arguments('playlistURL')
+    engine = get_arguments('engine')
+    responseFormat = get_arguments('format')
+    timings = get_arguments('timings') in ('1', 'true')   # Add the time of every stage to the response
+    options = get_options()   # Columns and range of tracks, only what they need is requested to the API
 
     if playlistName == '' or playlistURL == '':
         return render_template('index.html', error='Please enter playlist url and playlist name')
+    elif options is None:
+        return render_template('index.html', error='Please enter valid fields, offset and limit')
     else:
-        extractedData = Extract(playlistName, playlistGenre, playlistURL)
+        if responseFormat == 'ndjson':
+            extractedData = Extract(playlistName, playlistGenre, playlistURL, stream=True, **options)   # The tracks are extracted while they are sent
+            if extractedData.playlist.status_code != 200:
+                return render_template('index.html', error='Please enter a valid url')
+            return Response(stream_with_context(ndjson_lines(extractedData)), mimetype='application/x-ndjson')
+
+        key = None if timings else resultCache.getKey(playlistName, playlistGenre, playlistURL, options)   # The timings are only known by extracting
+
+        if key is not None:   # The same snapshot of the playlist is only extracted once
+            response = resultCache.fetch(*key, lambda: extractBody(playlistName, playlistGenre, playlistURL, engine, options))
+            if response is None:
+                return render_template('index.html', error='Please enter a valid url')
+            body, etag = response
+            if etag_matches(etag):
+                return Response(status=304, headers={'ETag': f'"{etag}"'})
+            return Response(body, mimetype='application/json', headers={'ETag': f'"{etag}"'})
+
+        extractedData = extractPlaylist(playlistName, playlistGenre, playlistURL, engine, options)
         if extractedData.playlist.status_code != 200:
             return render_template('index.html', error='Please enter a valid url')
         else:
-            return jsonify(extractedData.trackData)
+            if timings:
+                return Response('{"tracks":' + tracks_json(extractedData.trackData) + ',"timings":' + json.dumps(extractedData.metrics.summary()) + '}',
+                                mimetype='application/json')
+            return Response(tracks_json(extractedData.trackData), mimetype='application/json')
+
+
+def extractPlaylist(playlistName, playlistGenre, playlistURL, engine, options=None):
+    '''
+    This function will extract the playlist with the chosen engine and options (columns, offset, limit), and log how it went
+    '''
+    options = options or {}
+    if engine == 'async':
+        extractedData = ExtractAsync(playlistName, playlistGenre, playlistURL, **options)
+    else:
+        extractedData = Extract(playlistName, playlistGenre, playlistURL, **options)
+    app.logger.info(rateLimiter.report())
+    app.logger.info(itemCache.report())
+    app.logger.info(transport.report())
+    app.logger.info(extractedData.metrics.summary())
+    if extractedData.failedTracks:
+        app.logger.warning(f'{len(extractedData.failedTracks)} tracks failed: {extractedData.failedTracks}')
+    return extractedData
+
+
+def extractBody(playlistName, playlistGenre, playlistURL, engine, options=None):
+    '''
+    This function will extract the playlist and return the body of the response and whether it can be cached,
+    or None if the url is not valid. The responses with failed tracks are not cached, they are extracted again
+    '''
+    extractedData = extractPlaylist(playlistName, playlistGenre, playlistURL, engine, options)
+    if extractedData.playlist.status_code != 200:
+        return None
+    return tracks_json(extractedData.trackData).encode(), not extractedData.failedTracks
+
+
+@app.after_request
+def compressResponse(response):
+    '''
+    This function will compress the JSON and NDJSON responses with the encoding preferred by the client, gzip or br
+    The streamed responses are compressed while they are sent, and the small ones are not compressed
+    The compressed responses get their own ETag, so they are never mistaken for the uncompressed ones
+    '''
+    if response.status_code != 200 or response.mimetype not in COMPRESSED_MIMETYPES or 'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')   # The body depends on the encodings accepted by the client
+    encoding = get_encoding()
+
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compressChunks(response.iter_encoded(), encoding)
+    elif len(response.get_data()) >= MIN_COMPRESSED_BYTES:
+        response.set_data(compressBody(response.get_data(), encoding))
+    else:
+        return response
+
+    response.headers['Content-Encoding'] = encoding
+
+    etag, weak = response.get_etag()
+    if etag is not None:
+        response.set_etag(f'{etag}-{encoding}', weak)
+
+    return response
+
+
+@app.route('/jobs', methods=['POST'])
+def createJob():
+    playlistName = get_arguments('playlistName')
+    playlistGenre = get_arguments('playlistGenre') or ''
+    playlistURL = get_arguments('playlistURL')
+
+    if not playlistName or not playlistURL:
+        return jsonify({'error': 'Please enter playlist url and playlist name'}), 400
+    else:
+        job = jobQueue.submit(playlistName, playlistGenre, playlistURL)
+        return jsonify({'job_id': job['job_id'], 'status': job['status']}), 202, {'Location': f"/jobs/{job['job_id']}"}
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def getJob(job_id):
+    job = jobQueue.get(job_id)
+
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    else:
+        return jsonify(job)
+
+
+@app.route('/metrics', methods=['GET'])
+def getMetrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')   # Prometheus text format
 
 
 if __name__ == '__main__':
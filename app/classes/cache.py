@@ -0,0 +1,4 @@
+from spotify_core.cache import *
+from variables import *
+
+itemCache = ItemCache(CACHE_PATH, CACHE_TTL, CACHE_MAX_ITEMS)   # Cache shared by all the extractions of the process
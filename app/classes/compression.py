@@ -0,0 +1,48 @@
+import gzip
+import zlib
+
+from variables import *
+
+def availableEncodings():
+    '''
+    This function will return the content encodings that can be sent, in order of preference
+    br is only available if the brotli package is installed
+    '''
+    try:
+        import brotli   # Optional, gzip is always available
+    except ImportError:
+        return ['gzip']
+
+    return ['br', 'gzip']
+
+
+def compressBody(body, encoding):
+    '''
+    This function will compress the whole body of a response with the given encoding
+    '''
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)   # No timestamp, so the same body is always compressed the same way
+
+
+def compressChunks(chunks, encoding):
+    '''
+    This function will compress a streamed body with the given encoding, returning the compressed data of every chunk
+    as soon as it arrives. The compressor is flushed after every chunk, otherwise it would keep the data until it has
+    enough, and the client wouldn't get anything until the end of the stream. The chunks should be large (a page of
+    tracks, not a line), so the flushes don't spoil the compression
+    '''
+    if encoding == 'br':
+        import brotli
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)   # 16 + MAX_WBITS writes the gzip header
+        compress, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+    for chunk in chunks:
+        yield compress(chunk) + flush()   # Everything compressed so far can be decompressed by the client
+
+    yield finish()
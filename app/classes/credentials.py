@@ -0,0 +1,5 @@
+from spotify_core.credentials import *
+from variables import *
+from variablesPriv import *
+
+tokenManager = TokenManager(AUTH_URL, CLIENT_ID, CLIENT_SECRET, TOKEN_REFRESH_MARGIN)   # Token shared by all the extractions of the process
@@ -1,21 +1,20 @@
-import requests
-from time import sleep
-import pandas as pd
-
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from classes.cache import *
+from classes.credentials import *
+from classes.flatten import *
+from classes.limiter import *
+from classes.metrics import *
+from classes.transport import *
 from variables import *
-from variablesPriv import *
 
 class Extract():
     '''
     This class contains all the necessary data to extract all the tracks from a given playlist, store the 
     track details, and save it into a csv file.
     '''
-    offset = 0   # The offset is set to 0 and it will be increased later
-
-    trackData = {}   # Empty dictionary where all the data will be stored
-
-
-    def __init__(self, playlistName, playlistGenre, playlistURL):
+    def __init__(self, playlistName, playlistGenre, playlistURL, stream=False, columns=None, offset=0, limit=None):
         '''
         This function will initiate the clase, given the following playlist elements:
             · name
@@ -24,19 +23,47 @@ class Extract():
             · name
         It will create the necessary authentifications, extract all the data, 
         store it in dictionaries, and save it as csv
+        With stream=True only the first page is requested, and the tracks are extracted
+        while iterating over iterTrackData
+        Optionally, only some of the tracks and columns are extracted:
+            · columns: the columns of every track, only the endpoints they need are called
+            · offset and limit: the range of tracks of the playlist, only its pages are requested
         '''
         self.playlistName = playlistName
         self.playlistGenre = playlistGenre
         self.playlistURL = playlistURL
 
+        self.columns = ColumnSelection(columns)   # Page fields, getter and endpoints of the selected columns
+
+        self.offset = offset   # Position of the first track that is extracted
+        self.limit = limit   # Maximum number of tracks extracted, None extracts the rest of the playlist
+
+        self.failedTracks = []   # Tracks that couldn't be extracted, with the reason
+        self.failedItems = {}   # Reason under the endpoint and id of the artists and audio features that couldn't be requested
+
+        self.metrics = RequestMetrics()   # Time of every stage and counters of this extraction
+
         self.getPlaylistID()   # Transform the playlist link to get the id
         self.modEmptyGenre()   # Modify the genre if empty
-        self.authenticate()   # Create the authentification to access data
-        self.playlist = self.apiCall(f'playlists/{self.playlistID}/tracks', {'offset':self.offset})
-        if self.playlist.status_code == 200:
+
+        self.trackData = {}   # Empty dictionary where all the tracks of this extraction will be stored
+
+        self.extract(stream)   # Authenticate and extract all the data
+
+
+    def extract(self, stream):
+        '''
+        This function will authenticate and request the first page of the playlist, and then, without stream,
+        extract all its tracks
+        '''
+        with self.metrics.stage('auth'):
+            self.authenticate()   # Create the authentification to access data
+        with self.metrics.stage('pagination'):
+            self.playlist = self.apiCall(f'playlists/{self.playlistID}/tracks', self.pageParameters(self.offset))
+        if not stream and self.playlist.status_code == 200:   # With stream the tracks are only kept while every page is extracted
             self.getAllTracks(self.playlist.json())   # Access each of the tracks of the playlist
             self.extractAllData()   # Extract all the data which will be stored
-        
+
 
     def getPlaylistID(self):
         '''
@@ -55,148 +82,270 @@ class Extract():
 
     def authenticate(self):
         '''
-        This function will create the personalised headers to get data from the API
-        Needed personal variables: client_id, client_secret
+        This function will get the personalised headers to get data from the API
+        The token is shared by all the extractions, it's only requested again when it's about to expire
         '''
-        # create the response from the API
-        authResponse = requests.post(AUTH_URL, {'grant_type': 'client_credentials',
-                                                     'client_id': CLIENT_ID,
-                                                     'client_secret': CLIENT_SECRET,})
+        self.headers = tokenManager.getHeaders()   # Save the headers
 
-        authResponseData = authResponse.json()   # convert the response to JSON
 
-        self.headers = {'Authorization': 'Bearer {token}'.format(token=authResponseData['access_token'])}   # Save the headers
+    def apiCall(self, url_string, parameters=None):
+        '''
+        This function will do individual calls to the API through the shared transport
+        Every call waits for its turn in the shared rate limiter, and throttled calls are retried
+        The same call in flight in any extraction of the process is not done again, its response is awaited
+        The time of every call and of the waits is added to the metrics
+        '''
+        return transport.get(url_string, parameters, self.metrics)
 
 
-    def apiCall(self, url_string, parameters=None):
+    def pageParameters(self, offset):
+        '''
+        This function will return the parameters of the page of the playlist starting at the given offset
+        Only the fields read by the getters of the selected columns are requested, so the pages are much smaller
+        The last page of a limited range only has the tracks of the range
+        '''
+        limit = PAGE_SIZE if self.limit is None else min(PAGE_SIZE, self.offset + self.limit - offset)
+
+        return {'offset':offset, 'limit':limit, 'fields':self.columns.pageFields}
+
+
+    def pageOffsets(self, playlist):
+        '''
+        This function will return the offsets of the pages after the first one, up to the end of the range of tracks
+        The first page already tells us the total number of tracks
+        '''
+        end = playlist['total'] if self.limit is None else min(playlist['total'], self.offset + self.limit)
+
+        return range(self.offset + PAGE_SIZE, end, PAGE_SIZE)
+
+
+    def getPage(self, offset):
+        '''
+        This function will get the 100 tracks of the playlist starting at the given offset
+        '''
+        return self.apiCall(f'playlists/{self.playlistID}/tracks', self.pageParameters(offset)).json()['items']
+
+
+    def iterPages(self, playlist):
+        '''
+        This function will return the items of every page of the playlist, in playlist order, starting with the given first page
+        The first page already tells us the total number of tracks, so the offsets of the remaining pages are
+        known and the pages are requested concurrently. Only PAGINATION_WORKERS pages are requested ahead of
+        the one being returned, so the pages don't pile up in memory when they are consumed slowly
+        '''
+        yield playlist['items']
+
+        offsets = self.pageOffsets(playlist)   # Offsets of the remaining pages
+
+        if len(offsets) > 0:
+            with ThreadPoolExecutor(max_workers=min(PAGINATION_WORKERS, len(offsets))) as executor:
+                pages = deque()   # Pages requested and not returned yet, in playlist order
+
+                for offset in offsets:
+                    pages.append(executor.submit(self.getPage, offset))
+
+                    if len(pages) >= PAGINATION_WORKERS:
+                        yield pages.popleft().result()
+
+                while pages:
+                    yield pages.popleft().result()
+
+
+    def timedPages(self, playlist):
         '''
-        This function will do individual calls to the API
+        This function will return the pages of iterPages, timing only the wait for every page as pagination, so the
+        time spent with a page once it has arrived (flatten, enrichment) is not added to it
         '''
-        return requests.get(BASE_URL + url_string, headers=self.headers, params=parameters)
+        pages = self.iterPages(playlist)
+
+        while True:
+            with self.metrics.stage('pagination'):
+                page = next(pages, None)
+
+            if page is None:
+                return
+
+            yield page
 
 
     def getAllTracks(self, playlist):
         '''
         This function will get a list with all the tracks from the given playlist
+        Every page is read as soon as it arrives, and only the ids and features of its tracks are kept, so the
+        payload of the page (markets, images, urls...) is freed
         '''
-        self.playlistItems = playlist['items']   # Keep just the list with the items values
+        self.pendingTracks = []   # Keep just the ids and features of the tracks
 
-        # This loop will iterate over all the tracks from the playlist while the offset (starting
-        # from 0) is smaller than the total number of tracks, which we can find under the key 'total'
-        while self.offset < playlist['total']:  
+        for page in self.timedPages(playlist):
+            with self.metrics.stage('flatten'):
+                self.pendingTracks.extend(self.getPendingTracks(page))
 
-            self.offset += 100   # adding 100 to the offset will get the next 100 tracks and we will do a new call
 
-            playlist = self.apiCall(f'playlists/{self.playlistID}/tracks', {'offset':self.offset}).json()   # add the result to a dictionary
+    def getCachedItems(self, endpoint, ids):
+        '''
+        This function will return the items of the given ids that are in the cache, counting the hits and misses
+        '''
+        items = itemCache.getMany(endpoint, ids)
 
-            for elem in playlist['items']:   # append the new values to the previous list
-                self.playlistItems.append(elem)
+        requested = len(set(ids))
+        self.metrics.count('extract_cache_hits_total', 'cache_hits', len(items), kind=endpoint)
+        self.metrics.count('extract_cache_misses_total', 'cache_misses', requested - len(items), kind=endpoint)
 
+        return items
 
-    def defineTrackID(self, track):
+
+    def storeFailedBatch(self, endpoint, batch, statusCode):
         '''
-        This function will modify the track name, call the api and return the id of the track
+        This function will store the reason of every item of a batch that couldn't be requested, so its tracks
+        are added to failedTracks when they are enriched
         '''
-        track_id = track['track']['uri']   # Obtain the track id from the track uri
+        self.metrics.count('extract_failed_batches_total', 'failed_batches', endpoint=endpoint)
 
-        track_id = track_id.replace('spotify:track:', '')   # Remove unnecesary characters from the id
+        for item_id in batch:
+            self.failedItems[(endpoint, item_id)] = f'{endpoint} call failed with status {statusCode}'
 
-        self.trackData[track_id] = {}   # Create a new dictionary key with the track id
 
-        return track_id
+    def storeFailedTrack(self, track_id, artist_id):
+        '''
+        This function will add the track to failedTracks if its artist or its audio features couldn't be requested
+        The track is still extracted, with None in the features that are missing
+        '''
+        reason = self.failedItems.get(('artists', artist_id)) or self.failedItems.get(('audio-features', track_id))
 
+        if reason is not None:
+            self.failedTracks.append({'track_id': track_id, 'reason': reason})
 
-    def addPlaylistData(self, individualTrackFeatures):
+
+    def getSeveralItems(self, endpoint, ids, batchSize):
         '''
-        This function will store the playlist url and name in order to keep the information next to the track
+        This function will call a multi-id endpoint (artists, audio-features) with batches of ids, and return
+        a dictionary with the values of the features of every returned item stored under its id
+        Only the ids that are not in the cache are requested, and nothing is requested if none of the selected
+        columns come from the endpoint. The ids that another extraction is already requesting are not sent again,
+        their items are awaited
         '''
-        individualTrackFeatures['playlist_url'] = self.playlistURL   # Store the playlist link 
-        individualTrackFeatures['playlist_name'] = self.playlistName   # Store the playlist name
-        individualTrackFeatures['genre'] = self.playlistGenre
+        if endpoint not in self.columns.endpoints:   # The tracks get None in its features
+            return {}
+
+        with self.metrics.stage(endpoint):
+            items = compactItems(endpoint, self.getCachedItems(endpoint, ids))   # Items stored in previous extractions
 
-        return individualTrackFeatures
+            newItems, failedBatches = transport.getSeveral(endpoint, [item_id for item_id in ids if item_id not in items], batchSize,
+                                                           lambda batchItems: itemCache.setMany(endpoint, batchItems), self.metrics)
 
+            for batch, statusCode in failedBatches:   # The calls failed after all the retries
+                self.storeFailedBatch(endpoint, batch, statusCode)
 
-    def addTrackMainFeatures(self, individualTrackFeatures, track):
+            items.update(compactItems(endpoint, newItems))   # Only the values of the features are kept, the payloads are freed
+
+        return items
+
+
+    def getPendingTracks(self, playlistItems):
         '''
-        This function will iterate over the main track features and extract them into a dictionary
+        This function will read every track of the page field by field: the track and artist ids, and the main
+        features of the selected columns, which are stored with the playlist link, name and genre
+        It returns a list with the track id, the artist id and the features of every track
+        The tracks that can't be read are added to failedTracks with the reason, the local files and episodes are skipped
         '''
-        for feature in TRACK_FEATURE_LIST:   # loop over the track main features and store them
-            try:
-                individualTrackFeatures[f'track_{feature}'] = track['track'][feature]
-            except:
-                individualTrackFeatures[feature] = None
-            
-        # Artist name
-        try:
-            individualTrackFeatures['artist_name'] = track['track']['artists'][0]['name']   # Extract and store the artist name 
-        except:
-            individualTrackFeatures['artist_name'] = None
+        trackFields = self.columns.trackFields
+
+        pendingTracks = []   # Tracks waiting for the artist and audio features
 
-        # Album name
-        try:
-            individualTrackFeatures['album'] = track['track']["album"]["name"]
-        except: 
-            individualTrackFeatures['album'] = None 
+        for item in playlistItems:
+            kind = skippedKind(item)
 
-        # Album cover
-        try:
-            individualTrackFeatures['album_cover'] = track['track']["album"]["images"][0]['url']
-        except:
-            individualTrackFeatures['album_cover'] = None
+            if kind is not None:   # They can't be extracted, they are only counted
+                self.metrics.count('extract_skipped_tracks_total', 'skipped_tracks', kind=kind)
+                continue
 
-        artist_id = track['track']["artists"][0]["uri"]   # Extract the id of the artist 
-        return individualTrackFeatures, artist_id.replace('spotify:artist:', '')
+            track_uri, artist_uri = IDS_GETTER.values(item)
 
-    
-    def addArtistFeatures(self, artistData, individualTrackFeatures):
+            if track_uri is None or artist_uri is None:   # Removed tracks don't have all the data
+                reason = 'The track has no id' if track_uri is None else 'The track has no artist'
+                self.failedTracks.append({'track_id': getPath(item, ('track', 'id')), 'reason': reason})
+                self.metrics.count('extract_dropped_tracks_total', 'dropped_tracks', reason=reason)
+                continue
+
+            features = {'playlist_url': self.playlistURL, 'playlist_name': self.playlistName, 'genre': self.playlistGenre}
+            addFields(features, item, trackFields)
+
+            pendingTracks.append((track_uri.replace('spotify:track:', ''), artist_uri.replace('spotify:artist:', ''), features))
+
+        return pendingTracks
+
+
+    def enrichTracks(self, pendingTracks, artists, audioFeatures):
         '''
-        This function will iterate over the main artist features and extract them into a dictionary
+        This function will add the artist and audio features to every pending track, and return the track id and its features
+        The artists and audio features without data get None in every feature
+        With columns, only the selected ones are returned, in their order
         '''
-        for feature in ARTIST_FEATURE_LIST:   # Loop over the artist main features, extract and store the data
-            try:
-                individualTrackFeatures[f'artist_{feature}'] = artistData[feature]
-            except:
-                individualTrackFeatures[feature] = None
+        if self.failedItems:
+            for track_id, artist_id, _ in pendingTracks:
+                self.storeFailedTrack(track_id, artist_id)
+
+        artistColumns = ENDPOINT_COLUMNS['artists']
+        audioColumns = ENDPOINT_COLUMNS['audio-features']
+
+        for track_id, artist_id, features in pendingTracks:
+            features.update(zip(artistColumns, artists.get(artist_id, ARTIST_GETTER.missing)))
+            features.update(zip(audioColumns, audioFeatures.get(track_id, AUDIO_GETTER.missing)))
+
+        columns = self.columns.columns
+
+        if columns is None:
+            return [(track_id, features) for track_id, _, features in pendingTracks]
 
-        return individualTrackFeatures
+        return [(track_id, {column: features.get(column) for column in columns}) for track_id, _, features in pendingTracks]
 
 
-    def addAudioFeatures(self, audioFeatures, individualTrackFeatures):
+    def storeTrackData(self, pendingTracks, artists, audioFeatures):
         '''
-        This function will iterate over all the audio features and extract them into a dictionary
+        This function will add the artist and audio features to every pending track, and store their features in trackData
         '''
-        for feature in AUDIO_FEATURES_LIST:   # Loop over the audio feature list, extract and store the data
-            try:
-                individualTrackFeatures[feature] = audioFeatures[feature] 
-            except:
-                individualTrackFeatures[feature] = None
-        
-        return individualTrackFeatures
+        self.trackData.update(self.enrichTracks(pendingTracks, artists, audioFeatures))
 
 
     def extractAllData(self):
         '''
         This function will loop over all the tracks, extract all their data, and store it into a nested dictionary
-        Since we have added dictionaries into track_list, and every dictionary has 100 tracks, 
-        we need to iterate over each of them
+        The artist and audio features are not requested track by track: the ids are collected first, and
+        then requested in batches to the multi-id endpoints
         '''
-        for track in self.playlistItems:   # This loop will iterate over the tracks in the dictionary and get the information
+        pendingTracks = self.pendingTracks
+        self.pendingTracks = []   # The features are kept by trackData once they are stored
 
-            try:
-                track_id = self.defineTrackID(track)   # Extract the track ID and create the dictionary key  
+        artists = self.getSeveralItems('artists', [artist_id for _, artist_id, _ in pendingTracks], ARTIST_BATCH_SIZE)   # Get every artist once
 
-                individualTrackFeatures = self.addPlaylistData({})   # Store playlist url and name
+        audioFeatures = self.getSeveralItems('audio-features', [track_id for track_id, _, _ in pendingTracks], AUDIO_FEATURES_BATCH_SIZE)   # Get the audio features
+
+        with self.metrics.stage('flatten'):
+            self.storeTrackData(pendingTracks, artists, audioFeatures)
+
+
+    def iterTrackData(self):
+        '''
+        This function will extract the tracks page by page, and return every track id and its features as soon as
+        its page has been enriched, without keeping them. It's used to stream the tracks of very large playlists
+        '''
+        for tracks in self.iterPageData():
+            yield from tracks
+
+
+    def iterPageData(self):
+        '''
+        This function will extract the tracks page by page, and return a list with the track id and features of the
+        tracks of every page as soon as it has been enriched
+        The artists already requested in previous pages are taken from the cache
+        '''
+        for page in self.timedPages(self.playlist.json()):
 
-                individualTrackFeatures, artist_id = self.addTrackMainFeatures(individualTrackFeatures, track)   # Extract the track main features, and store the artist id
-                
-                individualTrackFeatures = self.addArtistFeatures(self.apiCall(f'artists/{artist_id}').json(), individualTrackFeatures)   # Extract the artist main features
-                    
-                individualTrackFeatures = self.addAudioFeatures(self.apiCall(f'audio-features/{track_id}').json(), individualTrackFeatures)   # Extract the audio features
+            with self.metrics.stage('flatten'):
+                pendingTracks = self.getPendingTracks(page)
 
-                self.trackData[track_id] = individualTrackFeatures
+            artists = self.getSeveralItems('artists', [artist_id for _, artist_id, _ in pendingTracks], ARTIST_BATCH_SIZE)   # Get every artist once
 
-                sleep(0.1)
+            audioFeatures = self.getSeveralItems('audio-features', [track_id for track_id, _, _ in pendingTracks], AUDIO_FEATURES_BATCH_SIZE)   # Get the audio features
 
-            except:
-                continue
\ No newline at end of file
+            yield self.enrichTracks(pendingTracks, artists, audioFeatures)
@@ -0,0 +1,145 @@
+import asyncio
+
+from classes.cache import *
+from classes.extract import *
+from classes.metrics import *
+from classes.transport import *
+from variables import *
+
+class ExtractAsync(Extract):
+    '''
+    This class extracts the same data as Extract, but all the calls to the API are done with asyncio
+    over a single aiohttp session. The session keeps a pool of open connections, so the TCP and TLS
+    handshakes are only done once per connection instead of once per call.
+    '''
+    def __init__(self, playlistName, playlistGenre, playlistURL, connectionsPerHost=CONNECTIONS_PER_HOST,
+                 baseURL=BASE_URL, columns=None, offset=0, limit=None):
+        '''
+        This function will initiate the class, given the same playlist elements as Extract:
+            · name
+            · genre
+            · link
+        And optionally:
+            · the maximum number of open connections to every host
+            · the base URL, which can point to a local stub server (the authorisation URL is tokenManager.authURL)
+            · the columns, offset and limit of the tracks, as in Extract
+        '''
+        self.connectionsPerHost = connectionsPerHost
+        self.baseURL = baseURL
+
+        super().__init__(playlistName, playlistGenre, playlistURL, columns=columns, offset=offset, limit=limit)
+
+
+    def extract(self, stream):
+        '''
+        This function will run all the extraction steps in the event loop, the tracks are never streamed
+        '''
+        asyncio.run(self.run())   # Authenticate and extract all the data
+
+
+    async def run(self):
+        '''
+        This function will open the shared session and run all the extraction steps with it
+        '''
+        import aiohttp   # Only loaded by the async engine
+
+        connector = aiohttp.TCPConnector(limit_per_host=self.connectionsPerHost)
+
+        async with aiohttp.ClientSession(connector=connector) as self.session:
+            with self.metrics.stage('auth'):
+                self.headers = await self.getHeadersAsync()   # Get the authentification to access data
+            with self.metrics.stage('pagination'):
+                self.playlist = await self.apiCallAsync(f'playlists/{self.playlistID}/tracks', self.pageParameters(self.offset))
+            if self.playlist.status_code == 200:
+                with self.metrics.stage('pagination'):
+                    await self.getAllTracksAsync(self.playlist.json())   # Access each of the tracks of the playlist
+                await self.extractAllDataAsync()   # Extract all the data which will be stored
+
+
+    async def getHeadersAsync(self):
+        '''
+        This function will return the personalised headers to get data from the API
+        The token is shared with the rest of the extractions, and it's only requested when it's about to expire
+        '''
+        return await transport.getHeadersAsync()
+
+
+    async def apiCallAsync(self, url_string, parameters=None):
+        '''
+        This function will do individual calls to the API through the shared session, with the retries of the
+        shared transport, and return an ApiResponse
+        '''
+        return await transport.getAsync(self.session, url_string, parameters, self.metrics, self.baseURL)
+
+
+    async def getPageAsync(self, offset):
+        '''
+        This function will get the 100 tracks of the playlist starting at the given offset
+        '''
+        response = await self.apiCallAsync(f'playlists/{self.playlistID}/tracks', self.pageParameters(offset))
+
+        return response.json()['items']
+
+
+    async def getPendingPageAsync(self, offset):
+        '''
+        This function will get the page starting at the given offset and return the ids and features of its tracks,
+        so the payload of the page is freed as soon as it arrives
+        '''
+        page = await self.getPageAsync(offset)
+
+        return self.getPendingTracks(page)   # Timed with the pagination, the pages are flattened while the rest arrive
+
+
+    async def getAllTracksAsync(self, playlist):
+        '''
+        This function will get a list with all the tracks from the given playlist
+        All the remaining pages are requested at once, the connector limits how many are sent at the same time
+        '''
+        self.pendingTracks = self.getPendingTracks(playlist['items'])   # Keep just the ids and features of the tracks
+
+        offsets = self.pageOffsets(playlist)   # Offsets of the remaining pages
+
+        for pendingTracks in await asyncio.gather(*[self.getPendingPageAsync(offset) for offset in offsets]):   # gather keeps the playlist order
+            self.pendingTracks.extend(pendingTracks)
+
+
+    async def getSeveralItemsAsync(self, endpoint, ids, batchSize):
+        '''
+        This function will call a multi-id endpoint (artists, audio-features) with all the batches of ids at once,
+        and return a dictionary with the values of the features of every returned item stored under its id
+        Only the ids that are not in the cache are requested, and nothing is requested if none of the selected
+        columns come from the endpoint. The ids that another extraction is already requesting are not sent again,
+        their items are awaited
+        '''
+        if endpoint not in self.columns.endpoints:   # The tracks get None in its features
+            return {}
+
+        items = compactItems(endpoint, self.getCachedItems(endpoint, ids))   # Items stored in previous extractions
+
+        newItems, failedBatches = await transport.getSeveralAsync(self.session, endpoint, [item_id for item_id in ids if item_id not in items],
+                                                                  batchSize, lambda batchItems: itemCache.setMany(endpoint, batchItems),
+                                                                  self.metrics, self.baseURL)
+
+        for batch, statusCode in failedBatches:   # The calls failed after all the retries
+            self.storeFailedBatch(endpoint, batch, statusCode)
+
+        items.update(compactItems(endpoint, newItems))   # Only the values of the features are kept
+
+        return items
+
+
+    async def extractAllDataAsync(self):
+        '''
+        This function will extract all the data of the tracks, requesting the artists and audio features concurrently
+        '''
+        pendingTracks = self.pendingTracks
+        self.pendingTracks = []   # The features are kept by trackData once they are stored
+
+        with self.metrics.stage('enrichment'):   # Both endpoints at once, a stage for each one would overlap
+            artists, audioFeatures = await asyncio.gather(
+                self.getSeveralItemsAsync('artists', [artist_id for _, artist_id, _ in pendingTracks], ARTIST_BATCH_SIZE),   # Get every artist once
+                self.getSeveralItemsAsync('audio-features', [track_id for track_id, _, _ in pendingTracks], AUDIO_FEATURES_BATCH_SIZE))   # Get the audio features
+
+        with self.metrics.stage('flatten'):
+            self.storeTrackData(pendingTracks, artists, audioFeatures)
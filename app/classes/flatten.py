@@ -0,0 +1,83 @@
+import sys
+
+from spotify_core.flatten import *
+from variables import *
+
+# Path of every main feature inside a playlist item
+TRACK_PATHS = {**{f'track_{feature}': ('track', feature) for feature in TRACK_FEATURE_LIST},
+               'artist_name': ('track', 'artists', 0, 'name'),
+               'album': ('track', 'album', 'name'),
+               'album_cover': ('track', 'album', 'images', 0, 'url')}
+
+# Path of every feature inside an artist and inside the audio features of a track
+ARTIST_PATHS = {f'artist_{feature}': (feature,) for feature in ARTIST_FEATURE_LIST}
+AUDIO_PATHS = {feature: (feature,) for feature in AUDIO_FEATURES_LIST}
+
+PLAYLIST_COLUMNS = ['playlist_url', 'playlist_name', 'genre']
+
+IDS_GETTER = FieldGetter([('track', 'uri'), ('track', 'artists', 0, 'uri')])   # Track uri and artist uri of a playlist item
+ARTIST_GETTER = FieldGetter(list(ARTIST_PATHS.values()))
+AUDIO_GETTER = FieldGetter(list(AUDIO_PATHS.values()))
+
+TRACK_COLUMNS = PLAYLIST_COLUMNS + list(TRACK_PATHS) + list(ARTIST_PATHS) + list(AUDIO_PATHS)   # Columns of every track
+
+ENDPOINT_COLUMNS = {'artists': list(ARTIST_PATHS),   # Columns that are only known by calling every multi-id endpoint
+                    'audio-features': list(AUDIO_PATHS)}
+
+
+# Paths that tell the Spotify tracks apart from the local files and the episodes, which are skipped
+SKIP_PATHS = [('is_local',), ('track', 'is_local'), ('track', 'type'), ('track', 'id')]
+
+
+# Fields of the playlist pages that are requested: the total, and in every item only the fields read by the getters,
+# so the albums, markets, urls... are not sent
+PAGE_FIELDS = 'total,items(' + fieldsFilter(IDS_GETTER.paths + list(TRACK_PATHS.values()) + SKIP_PATHS) + ')'
+
+
+class ColumnSelection():
+    '''
+    This class keeps what an extraction needs to return only some of the columns of every track:
+        · the column and path of the selected main features, the columns that are not selected are not read
+        · the fields of the playlist pages, only the ids and the paths of the selected main features
+        · the multi-id endpoints that are called, the artists and audio features are only requested if one of
+          their columns is selected
+    Without columns, every column is selected
+    '''
+    def __init__(self, columns=None):
+        self.columns = columns
+
+        selected = set(TRACK_COLUMNS if columns is None else columns)
+
+        self.trackFields = [(column, path) for column, path in TRACK_PATHS.items() if column in selected]
+
+        self.pageFields = 'total,items(' + fieldsFilter(IDS_GETTER.paths + [path for _, path in self.trackFields] + SKIP_PATHS) + ')'
+
+        self.endpoints = {endpoint for endpoint, endpointColumns in ENDPOINT_COLUMNS.items() if selected.intersection(endpointColumns)}
+
+
+ALL_COLUMNS = ColumnSelection()   # Selection of the extractions that return every column
+
+
+ITEM_GETTERS = {'artists': ARTIST_GETTER, 'audio-features': AUDIO_GETTER}   # Getter of the items of every multi-id endpoint
+
+GENRES_INDEX = list(ARTIST_PATHS).index('artist_genres')   # Position of the genres in the values of an artist
+
+
+def compactItems(endpoint, items):
+    '''
+    This function will keep only the values of the features of every artist or audio features item, so the rest of
+    the payload (images, urls, followers...) is freed as soon as the items have been received
+    The genres are repeated by many artists, so they are interned and every genre is only kept once
+    '''
+    getter = ITEM_GETTERS[endpoint]
+
+    compact = dict(zip(items, getter.rows(list(items.values()))))
+
+    if endpoint == 'artists':
+        for item_id, values in compact.items():
+            if isinstance(values[GENRES_INDEX], list):
+                values = list(values)
+                values[GENRES_INDEX] = [sys.intern(genre) for genre in values[GENRES_INDEX]]
+                compact[item_id] = tuple(values)
+
+    return compact
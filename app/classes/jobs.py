@@ -0,0 +1,108 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from classes.extract import *
+from variables import *
+
+class JobQueue():
+    '''
+    This class runs the playlist extractions in a pool of background threads, so the web workers only queue them.
+    Every job keeps its status (queued, running, finished, failed), the number of tracks extracted out of the
+    total, and the final track data, so it can be polled until it has finished.
+    A job for a playlist that is already queued or running is not queued again, the running job is returned.
+    '''
+    def __init__(self, workers=JOB_WORKERS, maxFinishedJobs=MAX_FINISHED_JOBS):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.maxFinishedJobs = maxFinishedJobs   # The oldest finished jobs are removed after this number
+
+        self.jobs = OrderedDict()   # Every job under its id, in the order they were queued
+        self.activeJobs = {}   # Id of the queued or running job of every playlist
+        self.lock = threading.Lock()
+
+
+    def submit(self, playlistName, playlistGenre, playlistURL):
+        '''
+        This function will queue the extraction of a playlist and return its job
+        If the same extraction is already queued or running, that job is returned instead
+        '''
+        playlistKey = (playlistURL.split("/")[-1].split("?")[0], playlistName, playlistGenre)   # Same playlist id, name and genre
+
+        with self.lock:
+            if playlistKey in self.activeJobs:
+                return self.jobs[self.activeJobs[playlistKey]]
+
+            job = {'job_id': uuid.uuid4().hex,
+                   'status': 'queued',
+                   'playlist_id': playlistKey[0],
+                   'fetched': 0,   # Tracks extracted
+                   'total': None,   # Tracks in the playlist, known once the first page has been received
+                   'result': None,
+                   'failed': [],   # Tracks that couldn't be extracted, with the reason
+                   'timings': None,   # Time of every stage and counters, once the extraction has finished
+                   'error': None}
+
+            self.jobs[job['job_id']] = job
+            self.activeJobs[playlistKey] = job['job_id']
+
+        self.executor.submit(self.run, job, playlistKey, playlistName, playlistGenre, playlistURL)
+
+        return job
+
+
+    def run(self, job, playlistKey, playlistName, playlistGenre, playlistURL):
+        '''
+        This function will extract the playlist of the job, updating its progress after every track
+        '''
+        job['status'] = 'running'
+
+        try:
+            extractedData = Extract(playlistName, playlistGenre, playlistURL, stream=True)
+
+            if extractedData.playlist.status_code != 200:
+                job['error'] = 'Please enter a valid url'
+                job['status'] = 'failed'
+
+            else:
+                job['total'] = extractedData.playlist.json()['total']
+
+                trackData = {}
+
+                for track_id, features in extractedData.iterTrackData():
+                    trackData[track_id] = features
+                    job['fetched'] = len(trackData)
+
+                job['result'] = trackData
+                job['failed'] = extractedData.failedTracks
+                job['timings'] = extractedData.metrics.summary()
+                job['status'] = 'finished'
+
+        except Exception as error:
+            job['error'] = repr(error)
+            job['status'] = 'failed'
+
+        finally:
+            with self.lock:
+                del self.activeJobs[playlistKey]
+                self.removeFinishedJobs()
+
+
+    def removeFinishedJobs(self):
+        '''
+        This function will remove the oldest finished jobs when there are more than maxFinishedJobs
+        '''
+        finishedJobs = [job_id for job_id, job in self.jobs.items() if job['status'] in ('finished', 'failed')]
+
+        for job_id in finishedJobs[:max(0, len(finishedJobs) - self.maxFinishedJobs)]:
+            del self.jobs[job_id]
+
+
+    def get(self, job_id):
+        '''
+        This function will return the job with the given id, or None if it doesn't exist
+        '''
+        return self.jobs.get(job_id)
+
+
+jobQueue = JobQueue()   # Queue shared by all the requests of the process
@@ -0,0 +1,4 @@
+from spotify_core.limiter import *
+from variables import *
+
+rateLimiter = RateLimiter(RATE_LIMIT, MIN_RATE_LIMIT, RATE_BURST, RATE_INCREASE, BACKOFF_BASE, MAX_BACKOFF)   # Limiter shared by all the extractions of the process
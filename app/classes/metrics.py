@@ -0,0 +1,204 @@
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+from variables import *
+
+class Metrics():
+    '''
+    This class keeps the counters and timing histograms of all the extractions of the process, and writes them
+    in the Prometheus text format for the /metrics endpoint.
+    Every metric is kept under its name and labels, so the same metric can be split by stage, endpoint, status...
+    '''
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets   # Upper bounds of the histogram buckets, in seconds
+
+        self.counters = {}   # Value of every counter, under its name and labels
+        self.histograms = {}   # Bucket counts, sum and count of every histogram, under its name and labels
+        self.help = {}   # Description and type of every metric
+        self.lock = threading.Lock()
+
+
+    def describe(self, name, kind, description):
+        '''
+        This function will save the type (counter or histogram) and the description of a metric
+        '''
+        self.help[name] = (kind, description)
+
+
+    def increment(self, name, value=1, **labels):
+        '''
+        This function will add the value to the counter with the given name and labels
+        '''
+        key = (name, tuple(sorted(labels.items())))
+
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+    def observe(self, name, seconds, **labels):
+        '''
+        This function will add a duration to the histogram with the given name and labels
+        '''
+        key = (name, tuple(sorted(labels.items())))
+
+        with self.lock:
+            histogram = self.histograms.get(key)
+
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0, 'count': 0}
+
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+                    break
+
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+
+    def formatLabels(self, labels, **extraLabels):
+        '''
+        This function will write the labels of a sample, e.g. {endpoint="artists",status="200"}
+        '''
+        labels = list(labels) + list(extraLabels.items())
+
+        if not labels:
+            return ''
+
+        return '{' + ','.join('{}="{}"'.format(label, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                              for label, value in labels) + '}'
+
+
+    def render(self):
+        '''
+        This function will return all the metrics in the Prometheus text format
+        The histogram buckets are cumulative, as Prometheus expects them
+        '''
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: {'buckets': list(histogram['buckets']), 'sum': histogram['sum'], 'count': histogram['count']}
+                          for key, histogram in self.histograms.items()}
+
+        lines = []
+
+        for name, (kind, description) in self.help.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+
+            for (metricName, labels), value in sorted(counters.items()):
+                if metricName == name:
+                    lines.append(f'{name}{self.formatLabels(labels)} {value}')
+
+            for (metricName, labels), histogram in sorted(histograms.items()):
+                if metricName == name:
+                    cumulative = 0
+
+                    for bound, count in zip(self.buckets, histogram['buckets']):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{self.formatLabels(labels, le=bound)} {cumulative}')
+
+                    lines.append(f'{name}_bucket{self.formatLabels(labels, le="+Inf")} {histogram["count"]}')
+                    lines.append(f'{name}_sum{self.formatLabels(labels)} {histogram["sum"]}')
+                    lines.append(f'{name}_count{self.formatLabels(labels)} {histogram["count"]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()   # Metrics shared by all the extractions of the process
+
+metrics.describe('extract_stage_seconds', 'histogram', 'Time spent in every stage of an extraction')
+metrics.describe('extract_rate_limit_wait_seconds', 'histogram', 'Time every call to the Spotify API waited for the rate limiter')
+metrics.describe('spotify_api_call_seconds', 'histogram', 'Duration of the calls to the Spotify API, by endpoint')
+metrics.describe('spotify_api_calls_total', 'counter', 'Calls to the Spotify API, by endpoint and status code')
+metrics.describe('spotify_api_retries_total', 'counter', 'Calls to the Spotify API that were a retry, by endpoint')
+metrics.describe('spotify_api_throttled_total', 'counter', 'Responses with status 429, by endpoint')
+metrics.describe('extract_cache_hits_total', 'counter', 'Items taken from the cache, by kind')
+metrics.describe('extract_cache_misses_total', 'counter', 'Items requested to the API because they were not in the cache, by kind')
+metrics.describe('extract_failed_batches_total', 'counter', 'Calls for artists or audio features that failed after all the retries, by endpoint')
+metrics.describe('extract_dropped_tracks_total', 'counter', 'Tracks that could not be extracted, by reason')
+metrics.describe('extract_skipped_tracks_total', 'counter', 'Playlist items that are not Spotify tracks (local files, episodes), by kind')
+
+
+class RequestMetrics():
+    '''
+    This class measures a single extraction. Every measure is added to the shared metrics, and also to the
+    summary of the extraction, which can be returned with its result.
+    The stages don't overlap, so they add up to the duration of the extraction. The waits for the rate limiter are
+    part of the stages of their calls, and they are reported apart, added over all the calls, even concurrent ones
+    '''
+    def __init__(self):
+        self.stages = {}   # Seconds spent in every stage
+        self.waits = 0   # Seconds the calls waited for the rate limiter
+        self.endpoints = {}   # Calls and seconds of every endpoint
+        self.counters = {}   # Retries, 429s, cache hits and misses, dropped tracks
+        self.lock = threading.Lock()   # The pages are requested from several threads
+
+
+    @contextmanager
+    def stage(self, stage):
+        '''
+        This function will measure the time spent in a stage (auth, pagination, artists, audio-features...)
+        while the with block runs
+        '''
+        start = perf_counter()
+
+        try:
+            yield
+        finally:
+            seconds = perf_counter() - start
+            metrics.observe('extract_stage_seconds', seconds, stage=stage)
+
+            with self.lock:
+                self.stages[stage] = self.stages.get(stage, 0) + seconds
+
+
+    def wait(self, seconds):
+        '''
+        This function will register the time a call waited for its turn in the rate limiter
+        '''
+        metrics.observe('extract_rate_limit_wait_seconds', seconds)
+
+        with self.lock:
+            self.waits += seconds
+
+
+    def call(self, endpoint, seconds, statusCode, attempt):
+        '''
+        This function will register a call to the API, with its duration, status code and attempt number
+        '''
+        metrics.observe('spotify_api_call_seconds', seconds, endpoint=endpoint)
+        metrics.increment('spotify_api_calls_total', endpoint=endpoint, status=statusCode)
+
+        with self.lock:
+            calls = self.endpoints.setdefault(endpoint, {'calls': 0, 'seconds': 0})
+            calls['calls'] += 1
+            calls['seconds'] += seconds
+
+        if attempt > 0:
+            self.count('spotify_api_retries_total', 'retries', endpoint=endpoint)
+
+        if statusCode == 429:
+            self.count('spotify_api_throttled_total', 'throttled', endpoint=endpoint)
+
+
+    def count(self, name, summaryName, value=1, **labels):
+        '''
+        This function will add the value to a shared counter, and to the counter of the summary with the given name
+        '''
+        metrics.increment(name, value, **labels)
+
+        with self.lock:
+            self.counters[summaryName] = self.counters.get(summaryName, 0) + value
+
+
+    def summary(self):
+        '''
+        This function will return the measures of the extraction, with the times rounded to milliseconds
+        '''
+        with self.lock:
+            return {'stages': {stage: round(seconds, 3) for stage, seconds in self.stages.items()},
+                    'rate_limit_wait': round(self.waits, 3),
+                    'endpoints': {endpoint: {'calls': calls['calls'], 'seconds': round(calls['seconds'], 3)}
+                                  for endpoint, calls in self.endpoints.items()},
+                    'counters': dict(self.counters)}
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from time import monotonic, time
+
+from classes.metrics import *
+from classes.transport import *
+from variables import *
+
+class ResultCache():
+    '''
+    This class keeps the responses of /extract, so a playlist that is requested again is not extracted again.
+        · Every response is stored under the playlist id and its snapshot id, which changes every time the playlist
+          is modified, so a modified playlist is always extracted again, and under the selected columns and range
+        · The responses are kept in memory, the least recently used ones are removed after maxBytes, and optionally
+          in a SQLite file, so they are kept between restarts
+        · Every response has an ETag, so the clients that already have it get a 304 without the body
+        · When the same playlist is requested several times at once, it's only extracted once and all the requests
+          get the same response
+    '''
+    def __init__(self, path=RESULT_CACHE_PATH, maxBytes=RESULT_CACHE_MAX_BYTES, snapshotTTL=SNAPSHOT_TTL):
+        self.path = path   # None keeps the responses only in memory
+        self.maxBytes = maxBytes
+        self.snapshotTTL = snapshotTTL
+
+        self.responses = OrderedDict()   # Body and ETag of every response, the most recently used at the end
+        self.size = 0   # Bytes of the responses kept in memory
+        self.snapshots = {}   # Snapshot id of every playlist, with the time it was checked
+        self.extractions = {}   # Future of every response being extracted, under its key
+
+        self.connection = None   # The file is opened with the first call
+        self.lock = threading.Lock()
+
+
+    def connect(self):
+        '''
+        This function will open the SQLite file and create the table, if it's not already open
+        '''
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute('''CREATE TABLE IF NOT EXISTS responses (
+                                           key TEXT PRIMARY KEY, playlist TEXT, etag TEXT, body BLOB, stored REAL)''')
+
+        return self.connection
+
+
+    def getSnapshotID(self, playlistID):
+        '''
+        This function will return the current snapshot id of the playlist, or None if it can't be known
+        The snapshot id is checked on every request, unless snapshotTTL is set: then it's trusted for that many seconds,
+        so a burst of requests only checks it once, but a playlist modified within them gets the stale response
+        The call goes through the shared transport, with its retries, throttling and metrics
+        '''
+        snapshot = self.snapshots.get(playlistID)
+
+        if snapshot is not None and monotonic() - snapshot[1] < self.snapshotTTL:
+            return snapshot[0]
+
+        response = transport.get(f'playlists/{playlistID}', {'fields': 'snapshot_id'}, RequestMetrics())
+
+        if response.status_code != 200:   # The extraction will tell what happened
+            return None
+
+        snapshotID = response.json().get('snapshot_id')
+
+        if self.snapshotTTL > 0:
+            self.snapshots[playlistID] = (snapshotID, monotonic())
+
+        return snapshotID
+
+
+    def getKey(self, playlistName, playlistGenre, playlistURL, options=None):
+        '''
+        This function will return the key of the response: the playlist id and its current snapshot id, the name,
+        genre and link, which are in every track, and the options of the extraction (columns, offset, limit)
+        It returns None if the snapshot id can't be known
+        '''
+        options = options or {}
+
+        playlistID = playlistURL.split("/")[-1].split("?")[0]
+
+        snapshotID = self.getSnapshotID(playlistID)
+
+        if snapshotID is None:
+            return None
+
+        return playlistID, json.dumps([playlistID, snapshotID, playlistName, playlistGenre, playlistURL, options])
+
+
+    def get(self, playlistID, key):
+        '''
+        This function will return the body and ETag of the stored response, or None if it's not stored
+        '''
+        with self.lock:
+            response = self.responses.get(key)
+
+            if response is not None:
+                self.responses.move_to_end(key)   # It has been used now
+                return response
+
+            if self.path is None:
+                return None
+
+            row = self.connect().execute('SELECT body, etag FROM responses WHERE key = ?', (key,)).fetchone()
+
+        if row is not None:
+            self.store(playlistID, key, *row, toDisk=False)   # The next requests find it in memory
+
+        return row
+
+
+    def isReplaced(self, oldKey, key):
+        '''
+        This function will tell if the response stored under oldKey is replaced by the response of key: it's the same
+        one, or a response of an older snapshot of the same playlist. The responses with other options are kept
+        '''
+        oldKey, key = json.loads(oldKey), json.loads(key)
+
+        return oldKey[0] == key[0] and (oldKey[1] != key[1] or oldKey == key)
+
+
+    def store(self, playlistID, key, body, etag, toDisk=True):
+        '''
+        This function will store a response, removing the responses of older snapshots of the same playlist and,
+        if needed, the least recently used ones
+        '''
+        with self.lock:
+            for oldKey in [oldKey for oldKey in self.responses if self.isReplaced(oldKey, key)]:
+                self.size -= len(self.responses.pop(oldKey)[0])
+
+            self.responses[key] = (body, etag)
+            self.size += len(body)
+
+            while self.size > self.maxBytes and len(self.responses) > 1:
+                self.size -= len(self.responses.popitem(last=False)[1][0])
+
+            if self.path is not None and toDisk:
+                connection = self.connect()
+                oldKeys = [row for row in connection.execute('SELECT key FROM responses WHERE playlist = ?', (playlistID,))
+                           if self.isReplaced(row[0], key)]
+                connection.executemany('DELETE FROM responses WHERE key = ?', oldKeys)
+                connection.execute('INSERT INTO responses VALUES (?, ?, ?, ?, ?)', (key, playlistID, etag, body, time()))
+                connection.commit()
+
+
+    def fetch(self, playlistID, key, extract):
+        '''
+        This function will return the body and ETag of the response, extracting it with the extract function if it's
+        not stored. extract returns the body and whether it can be stored, or None if the playlist can't be extracted
+        A body with failed tracks is returned but not stored, so the next request extracts it again
+        If the same response is already being extracted, its result is awaited instead of extracting it again
+        '''
+        response = self.get(playlistID, key)
+
+        if response is not None:
+            metrics.increment('extract_result_cache_total', result='hit')
+            return response
+
+        with self.lock:
+            extraction = self.extractions.get(key)
+            leader = extraction is None
+
+            if leader:
+                extraction = self.extractions[key] = Future()
+
+        if not leader:
+            metrics.increment('extract_result_cache_total', result='coalesced')
+            return extraction.result()
+
+        metrics.increment('extract_result_cache_total', result='miss')
+
+        try:
+            result = extract()
+            response = None if result is None else (result[0], hashlib.sha1(result[0]).hexdigest())
+
+            if response is not None and result[1]:   # Bodies with failed tracks are not stored
+                self.store(playlistID, key, *response)
+
+            extraction.set_result(response)
+
+        except Exception as error:   # The waiting requests get the same error
+            extraction.set_exception(error)
+            raise
+
+        finally:
+            with self.lock:
+                del self.extractions[key]
+
+        return response
+
+
+resultCache = ResultCache()   # Responses shared by all the requests of the process
+
+metrics.describe('extract_result_cache_total', 'counter', 'Requests of /extract answered from the cache (hit), extracted (miss) or waiting for the same extraction (coalesced)')
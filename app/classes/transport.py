@@ -0,0 +1,29 @@
+from classes.credentials import *
+from classes.limiter import *
+from classes.metrics import *
+from spotify_core.transport import *
+from variables import *
+
+class MeteredTransport(Transport):
+    '''
+    This class is the shared transport of spotify_core, which also counts every call (and every id of the multi-id
+    calls) asked to it, and the ones that were coalesced, in the metrics of the process
+    '''
+    def countRequest(self, url_string, coalesced):
+        metrics.increment('spotify_api_requests_total', endpoint=endpointName(url_string))
+
+        if coalesced:
+            metrics.increment('spotify_api_coalesced_total', endpoint=endpointName(url_string))
+
+
+    def countItems(self, url_string, requested, coalesced):
+        metrics.increment('spotify_api_items_total', requested, endpoint=endpointName(url_string))
+        metrics.increment('spotify_api_coalesced_items_total', coalesced, endpoint=endpointName(url_string))
+
+
+transport = MeteredTransport(BASE_URL, rateLimiter, tokenManager, MAX_RETRIES, HTTP2, CONNECTIONS_PER_HOST)   # Transport shared by all the extractions of the process
+
+metrics.describe('spotify_api_requests_total', 'counter', 'Calls to the Spotify API asked to the transport, by endpoint, before coalescing')
+metrics.describe('spotify_api_coalesced_total', 'counter', 'Calls to the Spotify API that got the response of the same call in flight, by endpoint')
+metrics.describe('spotify_api_items_total', 'counter', 'Ids asked to the multi-id endpoints of the Spotify API, by endpoint, before coalescing')
+metrics.describe('spotify_api_coalesced_items_total', 'counter', 'Ids that got the item requested by another call in flight, by endpoint')
@@ -1,4 +1,64 @@
+import json
+
 from flask import request
 
+from classes.compression import *
+from classes.flatten import *
+
 def get_arguments(arg):
-    return request.args.get(arg, None)
\ No newline at end of file
+    return request.values.get(arg, None)   # Query string or form arguments
+
+
+def get_options():
+    '''
+    This function will return the options of the extraction given by fields, offset and limit:
+        · columns: the list of selected columns, or None for every column
+        · offset and limit: the range of tracks, limit is None for the rest of the playlist
+    It returns None if any of them is not valid
+    '''
+    fields = get_arguments('fields') or ''
+    offset = get_arguments('offset') or '0'
+    limit = get_arguments('limit') or ''
+
+    columns = [column.strip() for column in fields.split(',') if column.strip()] or None
+
+    if columns is not None and not set(columns).issubset(TRACK_COLUMNS):
+        return None
+
+    if not offset.isdigit() or not (limit == '' or limit.isdigit() and int(limit) > 0):
+        return None
+
+    return {'columns': columns, 'offset': int(offset), 'limit': int(limit) if limit else None}
+
+
+def get_encoding():
+    '''
+    This function will return the content encoding preferred by the client among the ones that can be sent,
+    or None if the response has to be sent without compression
+    '''
+    return request.accept_encodings.best_match(availableEncodings())
+
+
+def etag_matches(etag):
+    '''
+    This function will tell if the client already has the response with the given ETag, compressed or not
+    '''
+    encoding = get_encoding()
+
+    return request.if_none_match.contains(etag) or (encoding is not None and request.if_none_match.contains(f'{etag}-{encoding}'))
+
+
+def tracks_json(trackData):
+    '''
+    This function will write the extracted tracks as a JSON object, in playlist order and without spaces
+    '''
+    return json.dumps(trackData, separators=(',', ':'))
+
+
+def ndjson_lines(extractedData):
+    '''
+    This function will return every extracted track as a line of JSON, with the lines of every page in one chunk
+    as soon as the page has been extracted, so a compressed response is flushed once per page
+    '''
+    for tracks in extractedData.iterPageData():
+        yield ''.join(json.dumps({'track_id': track_id, **features}) + '\n' for track_id, features in tracks)
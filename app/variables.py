@@ -6,6 +6,63 @@ AUDIO_FEATURES_LIST = ['danceability', 'energy', 'key', 'loudness', 'mode',   #
                        'speechiness', 'acousticness', 'instrumentalness', 'liveness',   
                        'valence', 'tempo', 'duration_ms', 'time_signature'] 
 
+PAGE_SIZE = 100   # Maximum number of tracks returned in every playlist page
+
+PAGINATION_WORKERS = 8   # Maximum number of playlist pages requested at the same time
+
+CONNECTIONS_PER_HOST = 10   # Maximum number of open connections to every host, in the async engine and the shared transport
+
+HTTP2 = False   # Multiplex the calls to the API over HTTP/2, only if the httpx and h2 packages are installed
+               # It's off until the httpx client has been run against the API, the benchmarks only run over HTTP/1.1
+
+ARTIST_BATCH_SIZE = 50   # Maximum number of ids accepted by the artists endpoint
+
+AUDIO_FEATURES_BATCH_SIZE = 100   # Maximum number of ids accepted by the audio-features endpoint
+
+RATE_LIMIT = 20   # Maximum number of calls per second to the API
+
+MIN_RATE_LIMIT = 1   # The rate limiter never goes below this number of calls per second
+
+RATE_BURST = 20   # Number of calls that can be done at once after a quiet period
+
+RATE_INCREASE = 0.1   # Calls per second recovered after every successful call
+
+MAX_RETRIES = 5   # Number of times a throttled call is repeated
+
+BACKOFF_BASE = 1   # Seconds waited after the first throttled call, when the API doesn't send Retry-After
+
+MAX_BACKOFF = 60   # Maximum number of seconds waited between retries
+
+CACHE_PATH = 'cache.sqlite'   # File where the artists and audio features are cached between extractions
+
+CACHE_TTL = {'artists': 7 * 24 * 3600,   # Seconds an artist is kept, its genres and popularity can change
+             'audio-features': 365 * 24 * 3600}   # Seconds the audio features are kept, they don't change
+
+CACHE_MAX_ITEMS = 1000000   # Maximum number of items in the cache, the least recently used are removed
+
+TOKEN_REFRESH_MARGIN = 60   # Seconds before the token expires when a new one is requested
+
+JOB_WORKERS = 4   # Number of playlist extractions run at the same time in the background
+
+MAX_FINISHED_JOBS = 100   # Number of finished extractions kept, so their result can be polled
+
+RESULT_CACHE_MAX_BYTES = 200 * 2 ** 20   # Bytes of /extract responses kept in memory, the least recently used are removed
+
+RESULT_CACHE_PATH = None   # SQLite file where the /extract responses are also kept between restarts, None keeps them only in memory
+
+COMPRESSED_MIMETYPES = ['application/json', 'application/x-ndjson']   # Responses that are compressed when the client accepts it
+
+MIN_COMPRESSED_BYTES = 1024   # Smaller responses are sent without compression
+
+GZIP_LEVEL = 6   # Compression level of gzip, from 1 (fastest) to 9 (smallest)
+
+BROTLI_QUALITY = 5   # Quality of br, from 0 (fastest) to 11 (smallest), br is only used if the brotli package is installed
+
+SNAPSHOT_TTL = 0   # Seconds the snapshot id of a playlist is trusted before checking it again, 0 checks it on every request
+                  # With more than 0, a playlist modified within that time gets the previous response until it expires
+
+METRICS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]   # Upper bounds in seconds of the timing histograms
+
 AUTH_URL = 'https://accounts.spotify.com/api/token'
 
 BASE_URL = 'https://api.spotify.com/v1/'
\ No newline at end of file
@@ -0,0 +1,176 @@
+'''
+Benchmark of the flattening of the playlist items, artists and audio features into the track features.
+It compares the flattening of Extract, which reads every field of a track with its path and adds the artist and audio
+features kept by compactItems, with the previous per-field path, where every feature was extracted with its own try/except,
+on synthetic tracks with different amounts of missing data:
+    · complete: every track has all its data
+    · typical: some tracks don't have album cover, artist or audio features
+    · no audio features: the audio-features endpoint doesn't return anything, as for the apps that can't use it
+Both paths are timed up to the JSON of all the tracks, as /extract returns it
+
+Run it from the repository folder, no call is done so no credentials are needed:
+    python benchmarks/flatten.py [number of tracks]
+'''
+import os
+import random
+import sys
+import types
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+try:
+    import variablesPriv
+except ImportError:   # No call is done, the credentials are not used
+    sys.modules['variablesPriv'] = types.SimpleNamespace(CLIENT_ID='benchmark', CLIENT_SECRET='benchmark')
+
+from classes.extract import *
+from functions import tracks_json
+from variables import *
+
+
+def syntheticData(tracks, missingCovers, missingArtists, missingAudioFeatures):
+    '''
+    This function will create the playlist items, artists and audio features of the given number of tracks
+    The given fractions of tracks don't have album cover, artist or audio features
+    '''
+    random.seed(0)
+
+    items = []
+    artists = {}
+    audioFeatures = {}
+
+    for i in range(tracks):
+        artist_id = f'artist{i % 5000}'
+        images = [] if random.random() < missingCovers else [{'url': f'https://i.scdn.co/image/{i}'}]
+        items.append({'added_at': '2020-01-01T00:00:00Z',
+                      'track': {'uri': f'spotify:track:track{i}', 'id': f'track{i}', 'name': f'Track {i}', 'popularity': i % 100,
+                                'artists': [{'uri': f'spotify:artist:{artist_id}', 'name': f'Artist {i % 5000}'}],
+                                'album': {'name': f'Album {i % 20000}', 'images': images}}})
+
+        if random.random() >= missingArtists:
+            artists[artist_id] = {'id': artist_id, 'genres': ['pop', 'rock'], 'popularity': i % 100}
+
+        if random.random() >= missingAudioFeatures:
+            audioFeatures[f'track{i}'] = {feature: random.random() for feature in AUDIO_FEATURES_LIST}
+
+    return items, artists, audioFeatures
+
+
+def perFieldFlatten(items, artists, audioFeatures):
+    '''
+    This function will flatten the tracks as Extract did before, with a try/except for every feature of every track
+    The missing features get the same keys as the present ones, as they do now
+    '''
+    trackData = {}
+
+    for track in items:
+        try:
+            track_id = track['track']['uri'].replace('spotify:track:', '')
+            individualTrackFeatures = {'playlist_url': 'url', 'playlist_name': 'name', 'genre': 'genre'}
+
+            for feature in TRACK_FEATURE_LIST:
+                try:
+                    individualTrackFeatures[f'track_{feature}'] = track['track'][feature]
+                except:
+                    individualTrackFeatures[f'track_{feature}'] = None
+            try:
+                individualTrackFeatures['artist_name'] = track['track']['artists'][0]['name']
+            except:
+                individualTrackFeatures['artist_name'] = None
+            try:
+                individualTrackFeatures['album'] = track['track']["album"]["name"]
+            except:
+                individualTrackFeatures['album'] = None
+            try:
+                individualTrackFeatures['album_cover'] = track['track']["album"]["images"][0]['url']
+            except:
+                individualTrackFeatures['album_cover'] = None
+
+            artist_id = track['track']["artists"][0]["uri"].replace('spotify:artist:', '')
+        except:
+            continue
+
+        artistData = artists.get(artist_id, {})
+        for feature in ARTIST_FEATURE_LIST:
+            try:
+                individualTrackFeatures[f'artist_{feature}'] = artistData[feature]
+            except:
+                individualTrackFeatures[f'artist_{feature}'] = None
+
+        trackAudioFeatures = audioFeatures.get(track_id, {})
+        for feature in AUDIO_FEATURES_LIST:
+            try:
+                individualTrackFeatures[feature] = trackAudioFeatures[feature]
+            except:
+                individualTrackFeatures[feature] = None
+
+        trackData[track_id] = individualTrackFeatures
+
+    return trackData
+
+
+def newExtract():
+    '''
+    This function will create an Extract without calling the API, only its flattening methods are used
+    '''
+    extractedData = Extract.__new__(Extract)
+    extractedData.playlistURL, extractedData.playlistName, extractedData.playlistGenre = 'url', 'name', 'genre'
+    extractedData.failedTracks = []
+    extractedData.failedItems = {}
+    extractedData.columns = ALL_COLUMNS
+    extractedData.metrics = RequestMetrics()
+    extractedData.trackData = {}
+
+    return extractedData
+
+
+def getterFlatten(items, artists, audioFeatures):
+    '''
+    This function will flatten the tracks as Extract does: every page is read field by field, and its tracks are
+    enriched and stored into trackData
+    The artists and audio features are reduced to the values of their features, as getSeveralItems does
+    '''
+    extractedData = newExtract()
+
+    artists = compactItems('artists', artists)
+    audioFeatures = compactItems('audio-features', audioFeatures)
+
+    for start in range(0, len(items), PAGE_SIZE):
+        extractedData.storeTrackData(extractedData.getPendingTracks(items[start:start + PAGE_SIZE]), artists, audioFeatures)
+
+    return extractedData.trackData
+
+
+def measure(function, serialise, *arguments, repeat=3):
+    '''
+    This function will return the best time of the given number of runs of the function and the serialisation of its
+    result into JSON, and the JSON of the last one
+    '''
+    times = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        result = serialise(function(*arguments))
+        times.append(perf_counter() - start)
+
+    return min(times), result
+
+
+if __name__ == '__main__':
+    tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    scenarios = {'complete': (0, 0, 0),
+                 'typical': (0.05, 0.02, 0.01),
+                 'no audio features': (0.05, 0.02, 1)}
+
+    print(f'{tracks} tracks')
+
+    for scenario, missing in scenarios.items():
+        items, artists, audioFeatures = syntheticData(tracks, *missing)
+
+        perFieldTime, perFieldJSON = measure(perFieldFlatten, tracks_json, items, artists, audioFeatures)
+        getterTime, getterJSON = measure(getterFlatten, tracks_json, items, artists, audioFeatures)
+
+        print(f'{scenario:>17}: per-field try/except {perFieldTime:.3f} s, Extract {getterTime:.3f} s ({perFieldTime / getterTime:.2f}x), '
+              f'same tracks: {perFieldJSON == getterJSON}')
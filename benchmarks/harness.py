@@ -0,0 +1,213 @@
+'''
+Benchmark of the extractors against the local stand-in of the Spotify API (mock_spotify.py), without the network
+or credentials. Every extractor is run in its own process, from its own folder, and the harness reports:
+    · tracks/s: extracted tracks per second, from the first call to the last track
+    · calls/track: GET calls to the API (retries included) for every extracted track
+    · p50 and p99: latency of the calls, as seen by the extractor
+    · peak RSS: maximum memory of the process
+    · MB sent: bytes of all the responses of the stand-in
+
+Run it from the repository folder:
+    python benchmarks/harness.py [--engines Extract Extract_all Extract_100] [--sizes 100 1000 10000 100000]
+                                 [--latency 0.02] [--throttle-rate 0.01] [--rate-limit 1000]
+The rate limit of variables is kept unless --rate-limit is given, so the results include its waits.
+'''
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import types
+from time import perf_counter
+
+from mock_spotify import add_arguments, from_arguments
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENGINES = {'Extract': 'app',   # Folder every extractor is run from
+           'Extract_all': 'utils',
+           'Extract_100': 'utils'}
+
+
+def configure(folder, base_url, auth_url, rate_limit, output_folder):
+    '''
+    This function will point the variables of the extractors to the stand-in, before the classes are imported
+    The cache is a new file in the output folder, so every run requests all the artists and audio features
+    '''
+    import variables
+
+    variables.BASE_URL = base_url
+    variables.AUTH_URL = auth_url
+
+    if folder == 'app':
+        variables.CACHE_PATH = output_folder + 'cache.sqlite'
+        if rate_limit:
+            variables.RATE_LIMIT = variables.RATE_BURST = rate_limit
+
+        try:
+            import variablesPriv
+        except ImportError:   # The stand-in accepts any credentials
+            sys.modules['variablesPriv'] = types.SimpleNamespace(CLIENT_ID='benchmark', CLIENT_SECRET='benchmark')
+    else:
+        variables.cache_path = output_folder + 'cache.sqlite'
+        variables.entity_path = output_folder + 'entities.sqlite'
+        variables.output_folder = output_folder
+        if rate_limit:
+            variables.rate_limit = variables.rate_burst = rate_limit
+
+        if not hasattr(variables, 'CLIENT_ID'):   # The stand-in accepts any credentials
+            variables.CLIENT_ID = variables.CLIENT_SECRET = 'benchmark'
+
+
+def timed(send, latencies):
+    '''
+    This function will return the send method of a client, adding the latency of every GET it does to the list
+    '''
+    def timed_send(client, request, **kwargs):
+        start = perf_counter()
+        try:
+            return send(client, request, **kwargs)
+        finally:
+            if request.method == 'GET':
+                latencies.append(perf_counter() - start)
+
+    return timed_send
+
+
+def time_calls(latencies):
+    '''
+    This function will add the latency of every GET done with requests (and spotipy, which uses it) and with httpx
+    (the HTTP/2 transport) to the list
+    The stand-in only speaks HTTP/1.1, so httpx falls back to it: the multiplexing of HTTP/2 is not measured here
+    '''
+    import requests
+
+    requests.Session.send = timed(requests.Session.send, latencies)
+
+    try:
+        import httpx
+    except ImportError:   # The transports use requests
+        return
+
+    httpx.Client.send = timed(httpx.Client.send, latencies)
+
+
+def run_extract(playlist_link):
+    '''
+    This function will run the extractor of the app, and return the number of extracted tracks
+    '''
+    from classes.extract import Extract
+
+    return len(Extract('Benchmark', 'benchmark', playlist_link).trackData)
+
+
+def run_extract_all(playlist_link, engine):
+    '''
+    This function will run an extractor of utils with the given playlist instead of asking for it, and return
+    the number of extracted tracks
+    '''
+    import classes.extract_100
+    import classes.extract_all
+
+    class Benchmark_extraction(getattr(classes.extract_100, engine)):
+        def get_playlist_data(self):
+            self.playlist_name = 'Benchmark'
+            self.playlist_genre = 'benchmark'
+            self.playlist_link = playlist_link
+            self.file_name = 'benchmark'
+            self.playlist_id = playlist_link.split("/")[-1].split("?")[0]
+
+    extraction = Benchmark_extraction()
+
+    return len(getattr(extraction, 'done_tracks', extraction.track_data))   # Extract_all doesn't keep the tracks
+
+
+def run_child(engine, playlist_link, base_url, auth_url, rate_limit):
+    '''
+    This function will run an extractor in this process, from its folder, and print its measures as JSON
+    '''
+    folder = ENGINES[engine]
+    sys.path.insert(0, os.getcwd())
+
+    with tempfile.TemporaryDirectory() as output_folder:
+        configure(folder, base_url, auth_url, rate_limit, output_folder + '/')
+
+        latencies = []
+        time_calls(latencies)
+
+        start = perf_counter()
+        tracks = run_extract(playlist_link) if folder == 'app' else run_extract_all(playlist_link, engine)
+        seconds = perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':   # Linux gives kilobytes, macOS bytes
+        peak_rss *= 1024
+
+    print(json.dumps({'tracks': tracks, 'seconds': seconds, 'latencies': latencies, 'peak_rss': peak_rss}))
+
+
+def run(engine, size, server, rate_limit):
+    '''
+    This function will run an extractor in a new process and return its measures
+    '''
+    playlist_link = f'https://open.spotify.com/playlist/synthetic-{size}'
+
+    calls = dict(server.calls)
+
+    child = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', engine, playlist_link,
+                            server.url(), server.auth_url(), str(rate_limit or 0)],
+                           cwd=os.path.join(ROOT, ENGINES[engine]), capture_output=True, text=True)
+
+    if child.returncode != 0:
+        raise RuntimeError(f'{engine} failed with {size} tracks:\n{child.stderr}')
+
+    measures = json.loads(child.stdout.strip().splitlines()[-1])
+    measures['throttled'] = server.calls.get('throttled', 0) - calls.get('throttled', 0)
+    measures['bytes'] = server.calls.get('bytes', 0) - calls.get('bytes', 0)
+
+    return measures
+
+
+def report(engine, size, measures):
+    '''
+    This function will print a line of the results table
+    '''
+    tracks, seconds, latencies = measures['tracks'], measures['seconds'], measures['latencies']
+
+    if len(latencies) >= 2:
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p99 = percentiles[49] * 1000, percentiles[98] * 1000
+    else:
+        p50 = p99 = latencies[0] * 1000 if latencies else 0
+
+    print(f'{engine:<12} {size:>8} {tracks:>8} {seconds:>8.2f} {tracks / seconds:>10.0f} {len(latencies):>7} '
+          f'{len(latencies) / max(tracks, 1):>11.3f} {p50:>8.1f} {p99:>8.1f} {measures["peak_rss"] / 2 ** 20:>8.0f} '
+          f'{measures["throttled"]:>6} {measures["bytes"] / 2 ** 20:>8.1f}')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        engine, playlist_link, base_url, auth_url, rate_limit = sys.argv[2:]
+        run_child(engine, playlist_link, base_url, auth_url, float(rate_limit))
+        sys.exit()
+
+    parser = argparse.ArgumentParser(description='Benchmark of the extractors against the local stand-in of the Spotify API')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100, 1000, 10000])
+    parser.add_argument('--rate-limit', type=float, help='calls per second of the rate limiter, instead of the one in variables')
+    add_arguments(parser)
+    arguments = parser.parse_args()
+
+    server = from_arguments(arguments).start()
+
+    print(f'{"engine":<12} {"size":>8} {"tracks":>8} {"seconds":>8} {"tracks/s":>10} {"calls":>7} '
+          f'{"calls/track":>11} {"p50 ms":>8} {"p99 ms":>8} {"RSS MB":>8} {"429s":>6} {"MB sent":>8}')
+
+    for engine in arguments.engines:
+        for size in arguments.sizes:
+            report(engine, size, run(engine, size, server, arguments.rate_limit))
+
+    server.shutdown()
@@ -0,0 +1,161 @@
+'''
+Stress test of the isolation of the extractors: many extractions of different playlists are run at the same time in
+the threads of one process, against the local stand-in of the Spotify API (mock_spotify.py), and every extraction
+must only have the tracks of its own playlist, with its own playlist name and genre.
+Every extraction gets a synthetic playlist of a different size, so a track of another extraction, a missing track
+or a track extracted twice is found by comparing the track ids with the ones of the playlist:
+    · Extract: the extractor of the app, run from the app folder
+    · Extract_all: the extractors of utils, through Bulk_playlist, which lists and enriches a playlist without asking
+      for its elements, run from the utils folder
+
+Run it from the repository folder:
+    python benchmarks/isolation.py [--engines Extract Extract_all] [--extractions 64] [--threads 32] [--tracks 250]
+It exits with an error if any extraction got the tracks of another one.
+The synthetic playlists share their first tracks and artists, so it also measures how many of the calls and of the
+ids of the multi-id calls were coalesced by the transport when many extractions run at the same time (dedupe ratio)
+'''
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from harness import ROOT, ENGINES, configure
+from mock_spotify import add_arguments, from_arguments
+
+
+def extract_app(index, playlist_link):
+    '''
+    This function will extract a playlist with the extractor of the app, and return its tracks
+    '''
+    from classes.extract import Extract
+
+    extraction = Extract(f'Playlist {index}', f'genre {index}', playlist_link)
+
+    return dict(extraction.trackData.items())
+
+
+def extract_utils(index, playlist_link):
+    '''
+    This function will extract a playlist with the extractors of utils, and return its tracks
+    '''
+    from classes.extract_bulk import Bulk_playlist
+
+    playlist = Bulk_playlist(f'Playlist {index}', f'genre {index}', playlist_link)
+    playlist.list_tracks()
+
+    artists = playlist.api_call_several('artists', [artist_id for _, artist_id, _ in playlist.pending_tracks],
+                                        playlist.artist_batch_size)
+    audio_features = playlist.api_call_several('audio-features', [track_id for track_id, _, _ in playlist.pending_tracks],
+                                               playlist.audio_features_batch_size)
+
+    tracks = {}
+    for track_id, all_track_features in playlist.enrich_tracks(playlist.pending_tracks, artists, audio_features):
+        tracks[track_id] = dict(all_track_features)
+
+    return tracks
+
+
+def check(index, playlist_link, size, tracks):
+    '''
+    This function will return the errors of an extraction: the tracks that are not the ones of its playlist, or
+    don't have its playlist elements
+    '''
+    errors = []
+
+    expected = [f'track{position}' for position in range(size)]
+
+    if list(tracks) != expected:
+        errors.append(f'extraction {index}: {len(tracks)} tracks, {len(set(tracks) - set(expected))} of other playlists, '
+                      f'{len(set(expected) - set(tracks))} missing')
+
+    for track_id, features in tracks.items():
+        if (features['playlist_name'], features['genre'], features['playlist_url']) != (f'Playlist {index}', f'genre {index}', playlist_link):
+            errors.append(f'extraction {index}: {track_id} has the playlist elements of another extraction')
+            break
+
+    return errors
+
+
+def run_child(engine, extractions, threads, tracks, base_url, auth_url):
+    '''
+    This function will run all the extractions in the threads of this process, and print the errors as JSON
+    '''
+    folder = ENGINES[engine]
+    sys.path.insert(0, os.getcwd())
+
+    with tempfile.TemporaryDirectory() as output_folder:
+        configure(folder, base_url, auth_url, 100000, output_folder + '/')
+
+        extract = extract_app if folder == 'app' else extract_utils
+
+        if folder == 'app':
+            from classes.transport import transport
+        else:
+            from classes.http2_transport import http2_transport as transport
+
+        def run_extraction(index):
+            size = tracks + index   # Every playlist has a different size, so their tracks are different
+            playlist_link = f'https://open.spotify.com/playlist/synthetic-{size}'
+
+            return check(index, playlist_link, size, extract(index, playlist_link))
+
+        with open(os.devnull, 'w') as devnull:   # The extractors print their reports
+            stdout, sys.stdout = sys.stdout, devnull
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                errors = [error for errors in executor.map(run_extraction, range(extractions)) for error in errors]
+            sys.stdout = stdout
+
+    print(json.dumps({'errors': errors, 'transport': transport.report()}))
+
+
+def run(engine, extractions, threads, tracks, server):
+    '''
+    This function will run the extractions of an engine in a new process and return their errors, and the report of
+    its transport
+    '''
+    child = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', engine, str(extractions), str(threads),
+                            str(tracks), server.url(), server.auth_url()],
+                           cwd=os.path.join(ROOT, ENGINES[engine]), capture_output=True, text=True)
+
+    if child.returncode != 0:
+        raise RuntimeError(f'{engine} failed:\n{child.stderr}')
+
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+
+    return result['errors'], result['transport']
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        engine, extractions, threads, tracks, base_url, auth_url = sys.argv[2:]
+        run_child(engine, int(extractions), int(threads), int(tracks), base_url, auth_url)
+        sys.exit()
+
+    parser = argparse.ArgumentParser(description='Stress test of the isolation of the extractors running in threads')
+    parser.add_argument('--engines', nargs='+', choices=['Extract', 'Extract_all'], default=['Extract', 'Extract_all'])
+    parser.add_argument('--extractions', type=int, default=64, help='extractions of different playlists')
+    parser.add_argument('--threads', type=int, default=32, help='extractions run at the same time')
+    parser.add_argument('--tracks', type=int, default=250, help='tracks of the smallest playlist')
+    add_arguments(parser)
+    arguments = parser.parse_args()
+
+    server = from_arguments(arguments).start()
+
+    failed = False
+
+    for engine in arguments.engines:
+        errors, transport = run(engine, arguments.extractions, arguments.threads, arguments.tracks, server)
+        failed = failed or bool(errors)
+
+        print(f'{engine}: {arguments.extractions} extractions in {arguments.threads} threads, '
+              f'{"isolated" if not errors else str(len(errors)) + " errors"}')
+        for error in errors[:10]:
+            print(f'    {error}')
+        print(f'    {transport}')
+
+    server.shutdown()
+
+    sys.exit(1 if failed else 0)
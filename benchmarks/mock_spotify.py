@@ -0,0 +1,420 @@
+'''
+Local stand-in of the Spotify API, so the extractors can be run and measured without the network or credentials.
+It answers the same endpoints the extractors use:
+    · POST <anything>/token: a client credentials token, any client id and secret are accepted
+    · GET playlists/<id> and playlists/<id>/tracks?offset=&limit=&fields=: the playlist and its pages, with only the
+      given fields if there is a fields filter
+    · GET artists?ids= and audio-features?ids=: the items of the given ids, None for the unknown ones
+The playlists are synthetic, with the number of tracks in their id (synthetic-1000 has 1000 tracks), or
+recorded: a folder with <playlist id>.json (the list of playlist items), artists.json and audio-features.json
+(the items under their id). Every response can be delayed, and a fraction of the calls answered with a 429.
+The synthetic items only have the fields the extractors read, unless full_payloads is set, and then they also have
+the rest of the fields of the API (available markets, images, urls...), so the memory of the extractions is realistic.
+A fraction of the synthetic items can be local files and podcast episodes, which the extractors skip.
+
+Run it on its own to point the extractors at it, setting BASE_URL and AUTH_URL to the printed urls:
+    python benchmarks/mock_spotify.py [--port 8000] [--latency 0.05] [--throttle-rate 0.01]
+'''
+import argparse
+import json
+import os
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from urllib.parse import parse_qs, urlparse
+
+AUDIO_FEATURES = ['danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness', 'acousticness',
+                  'instrumentalness', 'liveness', 'valence', 'tempo', 'duration_ms', 'time_signature']
+
+MARKETS = [first + second for first in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' for second in 'ABCDEFG'][:185]   # As many markets as the API
+
+def parse_fields(fields):
+    '''
+    This function will read a fields filter of the API, e.g. total,items(track(name,album(name))), into a tree of keys
+    '''
+    tree = {}
+    node = tree
+    parents = []
+    name = ''
+
+    for char in fields:
+        if char == '(':
+            parents.append(node)
+            node = node.setdefault(name, {})
+            name = ''
+        elif char in ',)':
+            if name:
+                node.setdefault(name, {})
+                name = ''
+            if char == ')':
+                node = parents.pop()
+        else:
+            name += char
+
+    if name:
+        node.setdefault(name, {})
+
+    return tree
+
+
+def project(content, tree):
+    '''
+    This function will keep only the keys of the tree in the content, the filter of a list applies to all its items
+    '''
+    if not tree:
+        return content
+
+    if isinstance(content, list):
+        return [project(item, tree) for item in content]
+
+    if isinstance(content, dict):
+        return {key: project(value, tree[key]) for key, value in content.items() if key in tree}
+
+    return content
+
+
+class Synthetic_data():
+    '''
+    This class creates the playlist items, artists and audio features of the synthetic playlists
+    Every track and artist is always the same for the same index, so the runs can be compared
+    '''
+    def __init__(self, artist_ratio=0.3, full_payloads=False, other_rate=0):
+        self.artist_ratio = artist_ratio   # Different artists for every track of the playlist
+        self.full_payloads = full_payloads   # Add the fields of the API that the extractors don't read
+        self.other_rate = other_rate   # Fraction of the items that are local files or episodes, half of each
+
+    def playlist_items(self, playlist_id):
+        '''
+        This function will return the playlist items of a synthetic playlist, or None if the id is not synthetic
+        '''
+        if not playlist_id.startswith('synthetic-'):
+            return None
+
+        try:
+            size = int(playlist_id[len('synthetic-'):])
+        except ValueError:
+            return None
+
+        # Every track always has the same artist, whatever the playlist, and consecutive tracks share their artists
+        return [self.playlist_item(index, int(index * self.artist_ratio)) for index in range(size)]
+
+
+    def playlist_item(self, index, artist_index):
+        '''
+        This function will return a playlist item with the fields of the API that the extractors read
+        '''
+        if self.other_rate > 0 and random.Random(index).random() < self.other_rate:
+            return self.local_item(index) if index % 2 == 0 else self.episode_item(index)
+
+        item = {'added_at': '2020-01-01T00:00:00Z', 'is_local': False,
+                'track': {'id': f'track{index}', 'uri': f'spotify:track:track{index}', 'type': 'track', 'is_local': False,
+                          'name': f'Track {index}', 'popularity': index % 100,
+                          'artists': [{'id': f'artist{artist_index}', 'uri': f'spotify:artist:artist{artist_index}',
+                                       'name': f'Artist {artist_index}'}],
+                          'album': {'id': f'album{index // 10}', 'name': f'Album {index // 10}',
+                                    'images': [{'url': f'https://i.scdn.co/image/{index // 10}'}],
+                                    'available_markets': ['ES', 'GB', 'US']}}}
+
+        if self.full_payloads:
+            self.add_api_fields(item, index)
+
+        return item
+
+
+    def local_item(self, index):
+        '''
+        This function will return a local file, which has no ids
+        '''
+        return {'added_at': '2020-01-01T00:00:00Z', 'is_local': True,
+                'track': {'id': None, 'uri': f'spotify:local:Local+artist:Local+album:Local+track+{index}:200', 'type': 'track',
+                          'is_local': True, 'name': f'Local track {index}', 'popularity': 0,
+                          'artists': [{'id': None, 'uri': None, 'name': 'Local artist'}],
+                          'album': {'name': 'Local album', 'images': []}}}
+
+
+    def episode_item(self, index):
+        '''
+        This function will return a podcast episode, in the format of the tracks: its show is its artist and album
+        '''
+        return {'added_at': '2020-01-01T00:00:00Z', 'is_local': False,
+                'track': {'id': f'episode{index}', 'uri': f'spotify:episode:episode{index}', 'type': 'episode', 'is_local': False,
+                          'episode': True, 'track': False, 'name': f'Episode {index}', 'popularity': 0,
+                          'artists': [{'id': f'show{index % 10}', 'uri': f'spotify:show:show{index % 10}', 'name': f'Show {index % 10}',
+                                       'type': 'show'}],
+                          'album': {'name': f'Show {index % 10}', 'type': 'show', 'images': [{'url': f'https://i.scdn.co/image/show{index % 10}'}]}}}
+
+
+    def add_api_fields(self, item, index):
+        '''
+        This function will add to a playlist item the rest of the fields of the API
+        '''
+        track = item['track']
+        artist = track['artists'][0]
+
+        item.update({'added_by': {'id': 'user', 'type': 'user', 'uri': 'spotify:user:user', 'href': 'https://api.spotify.com/v1/users/user',
+                                  'external_urls': {'spotify': 'https://open.spotify.com/user/user'}},
+                     'primary_color': None, 'video_thumbnail': {'url': None}})
+        artist.update({'type': 'artist', 'href': f'https://api.spotify.com/v1/artists/{artist["id"]}',
+                       'external_urls': {'spotify': f'https://open.spotify.com/artist/{artist["id"]}'}})
+        track['album'].update({'id': f'album{index // 10}', 'album_type': 'album', 'type': 'album', 'total_tracks': 10,
+                               'release_date': '2020-01-01', 'release_date_precision': 'day', 'artists': [dict(artist)],
+                               'available_markets': list(MARKETS), 'uri': f'spotify:album:album{index // 10}',
+                               'href': f'https://api.spotify.com/v1/albums/album{index // 10}',
+                               'external_urls': {'spotify': f'https://open.spotify.com/album/album{index // 10}'},
+                               'images': [{'url': f'https://i.scdn.co/image/{size}{index // 10}', 'height': size, 'width': size}
+                                          for size in (640, 300, 64)]})
+
+        track.update({'available_markets': list(MARKETS), 'disc_number': 1, 'track_number': index % 10 + 1, 'explicit': False,
+                      'duration_ms': 200000, 'episode': False, 'track': True, 'preview_url': f'https://p.scdn.co/mp3-preview/{index}',
+                      'external_ids': {'isrc': f'ES{index:010d}'}, 'href': f'https://api.spotify.com/v1/tracks/track{index}',
+                      'external_urls': {'spotify': f'https://open.spotify.com/track/track{index}'}})
+
+
+    def artist(self, artist_id):
+        artist = {'id': artist_id, 'name': artist_id, 'genres': ['pop', 'dance pop'], 'popularity': len(artist_id) * 7 % 100}
+
+        if self.full_payloads:
+            artist.update({'type': 'artist', 'uri': f'spotify:artist:{artist_id}', 'followers': {'href': None, 'total': 1000},
+                           'href': f'https://api.spotify.com/v1/artists/{artist_id}',
+                           'external_urls': {'spotify': f'https://open.spotify.com/artist/{artist_id}'},
+                           'images': [{'url': f'https://i.scdn.co/image/{size}{artist_id}', 'height': size, 'width': size}
+                                      for size in (640, 320, 160)]})
+
+        return artist
+
+
+    def audio_features(self, track_id):
+        features = {feature: random.Random(track_id + feature).random() for feature in AUDIO_FEATURES}
+        features.update({'id': track_id, 'key': 5, 'mode': 1, 'duration_ms': 200000, 'time_signature': 4})
+
+        if self.full_payloads:
+            features.update({'type': 'audio_features', 'uri': f'spotify:track:{track_id}',
+                             'track_href': f'https://api.spotify.com/v1/tracks/{track_id}',
+                             'analysis_url': f'https://api.spotify.com/v1/audio-analysis/{track_id}'})
+
+        return features
+
+
+class Recorded_data(Synthetic_data):
+    '''
+    This class replays the playlists, artists and audio features saved in a folder
+    The synthetic playlists are still available
+    '''
+    def __init__(self, folder, artist_ratio=0.3, full_payloads=False, other_rate=0):
+        Synthetic_data.__init__(self, artist_ratio, full_payloads, other_rate)
+        self.folder = folder
+        self.artists = self.read('artists.json')
+        self.audio_features_items = self.read('audio-features.json')
+
+
+    def read(self, file_name):
+        path = os.path.join(self.folder, file_name)
+
+        if not os.path.exists(path):
+            return {}
+
+        with open(path) as recorded:
+            return json.load(recorded)
+
+
+    def playlist_items(self, playlist_id):
+        if os.path.exists(os.path.join(self.folder, playlist_id + '.json')):
+            return self.read(playlist_id + '.json')
+
+        return Synthetic_data.playlist_items(self, playlist_id)
+
+
+    def artist(self, artist_id):
+        return self.artists.get(artist_id)
+
+
+    def audio_features(self, track_id):
+        return self.audio_features_items.get(track_id)
+
+
+class Mock_handler(BaseHTTPRequestHandler):
+    '''
+    This class answers every request of the extractors, with the delay and the 429 responses of its server
+    '''
+    protocol_version = 'HTTP/1.1'   # The connections are kept open, as with the API
+
+    def log_message(self, format, *args):
+        pass
+
+
+    def send_json(self, content, status=200, headers=None):
+        body = json.dumps(content).encode()
+        self.server.count('bytes', len(body))
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))   # Client id and secret, any of them is valid
+        self.server.count('token')
+        self.send_json({'access_token': 'mock-token', 'token_type': 'Bearer', 'expires_in': 3600})
+
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parameters = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = url.path.strip('/').split('/')
+
+        self.server.delay()
+
+        if self.server.throttled():
+            self.server.count('throttled')
+            return self.send_json({'error': {'status': 429, 'message': 'API rate limit exceeded'}}, 429,
+                                  {'Retry-After': str(self.server.retry_after)})
+
+        if path[-1] == 'tracks' and len(path) >= 3 and path[-3] == 'playlists':
+            self.send_page(path[-2], int(parameters.get('offset', 0)), int(parameters.get('limit', 100)), parameters.get('fields'))
+        elif path[-2:-1] == ['playlists']:
+            self.send_playlist(path[-1], parameters.get('fields'))
+        elif path[-1] == 'artists':
+            self.send_items('artists', parameters.get('ids', ''), self.server.data.artist)
+        elif path[-1] == 'audio-features':
+            self.send_items('audio_features', parameters.get('ids', ''), self.server.data.audio_features)
+        else:
+            self.send_json({'error': {'status': 404, 'message': 'Service not found'}}, 404)
+
+
+    def send_page(self, playlist_id, offset, limit, fields=None):
+        items = self.server.playlist_items(playlist_id)
+
+        if items is None:
+            return self.send_json({'error': {'status': 404, 'message': 'Not found.'}}, 404)
+
+        self.server.count('tracks')
+        page = {'items': items[offset:offset + min(limit, 100)], 'total': len(items), 'offset': offset, 'limit': limit}
+        self.send_json(project(page, parse_fields(fields)) if fields else page)
+
+
+    def send_playlist(self, playlist_id, fields=None):
+        items = self.server.playlist_items(playlist_id)
+
+        if items is None:
+            return self.send_json({'error': {'status': 404, 'message': 'Not found.'}}, 404)
+
+        self.server.count('playlists')
+        playlist = {'id': playlist_id, 'name': playlist_id, 'snapshot_id': f'{playlist_id}-{len(items)}',
+                    'tracks': {'total': len(items)}}
+        self.send_json(project(playlist, parse_fields(fields)) if fields else playlist)
+
+
+    def send_items(self, response_key, ids, get_item):
+        self.server.count(response_key)
+        self.send_json({response_key: [get_item(item_id) for item_id in ids.split(',') if item_id]})
+
+
+class Mock_spotify(ThreadingHTTPServer):
+    '''
+    This class is the server of the stand-in, with its configuration and the number of calls to every endpoint
+        · latency: seconds every GET waits before being answered, and jitter, the random part of it (0.5 is ±50%)
+        · throttle_rate: fraction of the GETs answered with a 429, with Retry-After seconds
+        · other_rate: fraction of the synthetic items that are local files or episodes
+    '''
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0, jitter=0, throttle_rate=0, retry_after=0, recordings=None, artist_ratio=0.3,
+                 full_payloads=False, other_rate=0):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', port), Mock_handler)
+
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+
+        if recordings:
+            self.data = Recorded_data(recordings, artist_ratio, full_payloads, other_rate)
+        else:
+            self.data = Synthetic_data(artist_ratio, full_payloads, other_rate)
+        self.playlists = {}   # Items of every playlist already created, they are created once
+
+        self.calls = {}   # Number of responses of every kind, and bytes sent
+        self.lock = threading.Lock()
+
+
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}/v1/'
+
+
+    def auth_url(self):
+        return f'http://127.0.0.1:{self.server_port}/api/token'
+
+
+    def playlist_items(self, playlist_id):
+        with self.lock:
+            if playlist_id not in self.playlists:
+                self.playlists[playlist_id] = self.data.playlist_items(playlist_id)
+
+            return self.playlists[playlist_id]
+
+
+    def count(self, kind, value=1):
+        with self.lock:
+            self.calls[kind] = self.calls.get(kind, 0) + value
+
+
+    def delay(self):
+        if self.latency > 0:
+            sleep(self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+    def throttled(self):
+        return self.throttle_rate > 0 and random.random() < self.throttle_rate
+
+
+    def start(self):
+        '''
+        This function will serve the requests in a background thread, and return the server
+        '''
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def add_arguments(parser):
+    '''
+    This function will add the options of the stand-in to a command line parser
+    '''
+    parser.add_argument('--latency', type=float, default=0, help='seconds every call waits before being answered')
+    parser.add_argument('--jitter', type=float, default=0, help='random part of the latency, 0.5 is ±50%%')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='fraction of the calls answered with a 429')
+    parser.add_argument('--retry-after', type=int, default=0, help='Retry-After seconds of the 429 responses')
+    parser.add_argument('--recordings', help='folder with the recorded playlists, artists and audio features')
+    parser.add_argument('--artist-ratio', type=float, default=0.3, help='different artists for every track of the synthetic playlists')
+    parser.add_argument('--full-payloads', action='store_true', help='add all the fields of the API to the synthetic items')
+    parser.add_argument('--other-rate', type=float, default=0, help='fraction of the synthetic items that are local files or episodes')
+
+
+def from_arguments(arguments, port=0):
+    '''
+    This function will create the stand-in with the options of the command line
+    '''
+    return Mock_spotify(port, arguments.latency, arguments.jitter, arguments.throttle_rate, arguments.retry_after,
+                        arguments.recordings, arguments.artist_ratio, arguments.full_payloads, arguments.other_rate)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in of the Spotify API')
+    parser.add_argument('--port', type=int, default=8000)
+    add_arguments(parser)
+    arguments = parser.parse_args()
+
+    server = from_arguments(arguments, arguments.port)
+
+    print(f'BASE_URL = {server.url()!r}')
+    print(f'AUTH_URL = {server.auth_url()!r}')
+    print('Synthetic playlists: https://open.spotify.com/playlist/synthetic-<number of tracks>')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(server.calls)
@@ -0,0 +1,102 @@
+'''
+Benchmark of the size of the datasets with the flat and the normalized layout, with the local stand-in of the
+Spotify API (mock_spotify.py). A manifest of synthetic playlists is extracted with Extract_bulk, every layout in a
+new process, from the utils folder, with a new cache and entity store, and it reports:
+    · rows: rows of the flat file, or of every table
+    · MB: size of the files of the dataset
+    · artist and audio features calls: calls to the multi-id endpoints, to enrich the tracks
+
+The synthetic playlists share their first tracks, so the bigger the overlap, the more the normalized layout saves.
+Run it from the repository folder:
+    python benchmarks/normalized.py [--playlists 50] [--tracks 1000] [--format csv]
+'''
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from harness import ROOT, configure
+from mock_spotify import add_arguments, from_arguments
+
+
+def run_child(layout, manifest_path, base_url, auth_url, output_folder, output_format):
+    '''
+    This function will run the bulk extraction in this process, from the utils folder, and print the rows and
+    bytes of every file of the dataset as JSON
+    '''
+    sys.path.insert(0, os.getcwd())
+    configure('utils', base_url, auth_url, 100000, output_folder)
+
+    import variables
+    variables.output_format = output_format
+    variables.output_layout = layout
+
+    from classes.extract_bulk import Extract_bulk
+
+    with open(os.devnull, 'w') as devnull:   # Every playlist prints a line
+        stdout, sys.stdout = sys.stdout, devnull
+        extraction = Extract_bulk(manifest_path, 'benchmark')
+        sys.stdout = stdout
+
+    files = {}
+
+    for file_name in sorted(os.listdir(output_folder)):
+        if file_name.startswith('benchmark.'):
+            key_column = {'artists': 'artist_id', 'albums': 'album_id'}.get(file_name.split('.')[1], 'track_id')
+            rows = sum(1 for _ in extraction.read_file(output_folder + file_name, key_column))
+            files[file_name] = (rows, os.path.getsize(output_folder + file_name))
+
+    print(json.dumps(files))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        run_child(*sys.argv[2:])
+        sys.exit()
+
+    parser = argparse.ArgumentParser(description='Benchmark of the size of the flat and normalized datasets')
+    parser.add_argument('--playlists', type=int, default=50, help='synthetic playlists of the manifest')
+    parser.add_argument('--tracks', type=int, default=1000, help='tracks of every playlist')
+    parser.add_argument('--format', default='csv', choices=['csv', 'parquet', 'ndjson'])
+    add_arguments(parser)
+    arguments = parser.parse_args()
+
+    server = from_arguments(arguments).start()
+
+    print(f'{arguments.playlists} playlists of {arguments.tracks} tracks, {arguments.format}')
+
+    with tempfile.TemporaryDirectory() as folder:
+        manifest_path = os.path.join(folder, 'manifest.csv')
+
+        with open(manifest_path, 'w', newline='') as manifest:
+            writer = csv.writer(manifest)
+            writer.writerow(['name', 'genre', 'url'])
+            for playlist in range(arguments.playlists):
+                # Every playlist has a different size, so it has its own id for the stand-in
+                writer.writerow([f'Playlist {playlist}', 'benchmark',
+                                 f'https://open.spotify.com/playlist/synthetic-{arguments.tracks + playlist}'])
+
+        for layout in ['flat', 'normalized']:
+            calls = dict(server.calls)
+
+            with tempfile.TemporaryDirectory() as output_folder:
+                child = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', layout, manifest_path,
+                                        server.url(), server.auth_url(), output_folder + '/', arguments.format],
+                                       cwd=os.path.join(ROOT, 'utils'), capture_output=True, text=True)
+
+            if child.returncode != 0:
+                raise RuntimeError(f'The {layout} extraction failed:\n{child.stderr}')
+
+            files = json.loads(child.stdout.strip().splitlines()[-1])
+            enrichment = {kind: server.calls.get(kind, 0) - calls.get(kind, 0) for kind in ['artists', 'audio_features']}
+
+            print(f'{layout}: {sum(size for _, size in files.values()) / 2 ** 20:.2f} MB, '
+                  f'{enrichment["artists"]} artist calls, {enrichment["audio_features"]} audio features calls')
+
+            for file_name, (rows, size) in files.items():
+                print(f'    {file_name:<28} {rows:>8} rows {size / 2 ** 20:>8.2f} MB')
+
+    server.shutdown()
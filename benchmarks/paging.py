@@ -0,0 +1,88 @@
+'''
+Benchmark of the playlist pages with and without the fields filter of the extractors (PAGE_FIELDS in flatten).
+Every page of a synthetic playlist is requested to the local stand-in of the API (mock_spotify.py), once with all
+the fields and once with only the fields the extractors read, and it reports for both:
+    · MB: bytes of all the pages
+    · parse s: time spent reading the JSON of all the pages
+    · tracks: items that are extracted, the local files and episodes are skipped
+
+Run it from the repository folder, with --full-payloads so the pages have all the fields of the API:
+    python benchmarks/paging.py [--sizes 10000] --full-payloads [--other-rate 0.02]
+'''
+import argparse
+import json
+import os
+import sys
+import types
+from time import perf_counter
+
+import requests
+
+from mock_spotify import add_arguments, from_arguments
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+try:
+    import variablesPriv
+except ImportError:   # The credentials are not needed to build the filter
+    sys.modules['variablesPriv'] = types.SimpleNamespace(CLIENT_ID='benchmark', CLIENT_SECRET='benchmark')
+
+from classes.flatten import *
+from variables import *
+
+
+def getPages(server, size, fields):
+    '''
+    This function will request all the pages of the synthetic playlist and return their bodies
+    '''
+    url = server.url() + f'playlists/synthetic-{size}/tracks'
+
+    pages = []
+
+    with requests.Session() as session:
+        for offset in range(0, size, PAGE_SIZE):
+            parameters = {'offset': offset, 'limit': PAGE_SIZE}
+            if fields:
+                parameters['fields'] = fields
+
+            pages.append(session.get(url, params=parameters).content)
+
+    return pages
+
+
+def parsePages(pages):
+    '''
+    This function will read the JSON of all the pages, and return the seconds it took and the extracted items
+    '''
+    start = perf_counter()
+    items = [item for page in pages for item in json.loads(page)['items']]
+    seconds = perf_counter() - start
+
+    return seconds, sum(1 for item in items if skippedKind(item) is None)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark of the playlist pages with and without the fields filter')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10000])
+    add_arguments(parser)
+    arguments = parser.parse_args()
+
+    server = from_arguments(arguments).start()
+
+    print(f'fields filter: {PAGE_FIELDS}')
+
+    for size in arguments.sizes:
+        results = {}
+
+        for name, fields in (('all fields', None), ('fields filter', PAGE_FIELDS)):
+            pages = getPages(server, size, fields)
+            seconds, tracks = min(parsePages(pages) for _ in range(3))   # The fastest of 3 runs
+
+            results[name] = (sum(len(page) for page in pages), seconds)
+
+            print(f'{size:>8} {name:<14} {results[name][0] / 2 ** 20:>8.2f} MB {seconds:>7.3f} parse s {tracks:>8} tracks')
+
+        (allBytes, allSeconds), (filterBytes, filterSeconds) = results.values()
+        print(f'{size:>8} {"":<14} {allBytes / filterBytes:>8.1f}x smaller, {allSeconds / filterSeconds:.1f}x faster to parse')
+
+    server.shutdown()
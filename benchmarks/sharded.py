@@ -0,0 +1,115 @@
+'''
+Benchmark of the sharded extraction of a manifest (Extract_sharded) against the bulk extraction in a single process
+(Extract_bulk), with the local stand-in of the Spotify API (mock_spotify.py). The manifest has the given number of
+synthetic playlists, and every extraction is run in a new process, from the utils folder, with a new cache:
+    · rows: rows of the resulting file
+    · seconds and rows/s: from the start of the extraction to the resulting file
+    · speedup: rows/s compared with the bulk extraction
+
+Run it from the repository folder:
+    python benchmarks/sharded.py [--playlists 64] [--tracks 1000] [--processes 1 2 4 8] [--rate-limit 100000]
+The rate limit is shared by the processes, so it should be high enough not to be the limit of the extraction.
+The sharded extraction is experimental: on a single core it was 0.8x of the bulk extraction with 1 process and 0.3x
+with 2, and no configuration has been measured where it's faster. A speedup needs several free cores and a rate
+limit that is not reached.
+'''
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+from harness import ROOT, configure
+from mock_spotify import add_arguments, from_arguments
+
+
+def run_child(processes, manifest_path, base_url, auth_url, rate_limit, output_folder, output_format):
+    '''
+    This function will run the extraction in this process, from the utils folder, and print its measures as JSON
+    processes 0 is the bulk extraction
+    '''
+    sys.path.insert(0, os.getcwd())
+    configure('utils', base_url, auth_url, rate_limit, output_folder)
+
+    import variables
+    variables.output_format = output_format
+    variables.shard_workers = processes
+
+    from classes.extract_sharded import Extract_bulk, Extract_sharded
+
+    start = perf_counter()
+
+    with open(os.devnull, 'w') as devnull:   # Every playlist prints a line
+        stdout, sys.stdout = sys.stdout, devnull
+        extraction = Extract_bulk(manifest_path, 'benchmark') if processes == 0 else Extract_sharded(manifest_path, 'benchmark')
+        sys.stdout = stdout
+
+    seconds = perf_counter() - start
+
+    rows = sum(1 for _ in extraction.read_rows(output_folder + 'benchmark.' + output_format))
+
+    print(json.dumps({'rows': rows, 'seconds': seconds}))
+
+
+def run(processes, manifest_path, server, rate_limit, output_format):
+    '''
+    This function will run an extraction in a new process and return its measures
+    '''
+    with tempfile.TemporaryDirectory() as output_folder:
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(processes), manifest_path,
+                                server.url(), server.auth_url(), str(rate_limit or 0), output_folder + '/', output_format],
+                               cwd=os.path.join(ROOT, 'utils'), capture_output=True, text=True)
+
+    if child.returncode != 0:
+        raise RuntimeError(f'The extraction with {processes} processes failed:\n{child.stderr}')
+
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        processes, manifest_path, base_url, auth_url, rate_limit, output_folder, output_format = sys.argv[2:]
+        run_child(int(processes), manifest_path, base_url, auth_url, float(rate_limit), output_folder, output_format)
+        sys.exit()
+
+    parser = argparse.ArgumentParser(description='Benchmark of the sharded extraction of a manifest')
+    parser.add_argument('--playlists', type=int, default=64, help='synthetic playlists of the manifest')
+    parser.add_argument('--tracks', type=int, default=1000, help='tracks of every playlist')
+    parser.add_argument('--processes', nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument('--rate-limit', type=float, default=100000, help='calls per second of the rate limiter, for all the processes')
+    parser.add_argument('--format', default='ndjson', choices=['csv', 'parquet', 'ndjson'])
+    add_arguments(parser)
+    arguments = parser.parse_args()
+
+    server = from_arguments(arguments).start()
+
+    print(f'{arguments.playlists} playlists of {arguments.tracks} tracks, {os.cpu_count()} cores')
+    print(f'{"engine":<16} {"rows":>8} {"seconds":>8} {"rows/s":>8} {"speedup":>8}')
+
+    with tempfile.TemporaryDirectory() as folder:
+        manifest_path = os.path.join(folder, 'manifest.csv')
+
+        with open(manifest_path, 'w', newline='') as manifest:
+            writer = csv.writer(manifest)
+            writer.writerow(['name', 'genre', 'url'])
+            for playlist in range(arguments.playlists):
+                # Every playlist has a different size, so it has its own id for the stand-in
+                writer.writerow([f'Playlist {playlist}', 'benchmark',
+                                 f'https://open.spotify.com/playlist/synthetic-{arguments.tracks + playlist}'])
+
+                server.playlist_items(f'synthetic-{arguments.tracks + playlist}')   # Created before the first extraction
+
+        baseline = None
+
+        for processes in [0] + arguments.processes:
+            measures = run(processes, manifest_path, server, arguments.rate_limit, arguments.format)
+            rate = measures['rows'] / measures['seconds']
+            baseline = baseline or rate
+
+            engine = 'Extract_bulk' if processes == 0 else f'sharded x{processes}'
+            print(f'{engine:<16} {measures["rows"]:>8} {measures["seconds"]:>8.2f} {rate:>8.0f} {rate / baseline:>7.1f}x')
+
+    server.shutdown()
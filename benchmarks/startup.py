@@ -0,0 +1,79 @@
+'''
+Benchmark of the cold start of the web app and the CLI: the time spent importing their modules, measured with
+python -X importtime in a new process, and the heavy dependencies that are loaded before the first extraction.
+    · app: everything app.py imports, before the first request
+    · cli: everything main.py imports before a playlist extraction (Extract_all)
+    · cli-bulk: everything main.py imports before a bulk extraction (Extract_bulk)
+
+Run it from the repository folder:
+    python benchmarks/startup.py [number of runs]
+'''
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The credentials are not needed to import the modules
+CREDENTIALS = '''
+import sys, types
+try:
+    import variablesPriv
+except ImportError:
+    sys.modules['variablesPriv'] = types.SimpleNamespace(CLIENT_ID='benchmark', CLIENT_SECRET='benchmark')
+import variables
+if not hasattr(variables, 'CLIENT_ID'):
+    variables.CLIENT_ID = variables.CLIENT_SECRET = 'benchmark'
+'''
+
+TARGETS = {'app': ('app', 'import app'),   # Folder and imports of every target
+           'cli': ('utils', 'from classes.extract_all import *'),
+           'cli-bulk': ('utils', 'from classes.extract_bulk import *')}
+
+HEAVY_MODULES = ['pandas', 'pyarrow', 'spotipy', 'aiohttp', 'numpy']   # Dependencies that should only load when they are used
+
+
+def import_times(folder, imports):
+    '''
+    This function will import the modules in a new process, and return the total microseconds spent importing,
+    and the cumulative microseconds of every module (its own time and the time of the modules it imports)
+    '''
+    child = subprocess.run([sys.executable, '-X', 'importtime', '-c', CREDENTIALS + imports],
+                           cwd=os.path.join(ROOT, folder), capture_output=True, text=True)
+
+    if child.returncode != 0:
+        raise RuntimeError(child.stderr[-2000:])
+
+    total = 0
+    times = {}
+
+    for line in child.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, module = line[len('import time:'):].split('|')
+
+        times[module.strip()] = int(cumulative)
+
+        if not module.startswith('  '):   # Top level import, its cumulative time includes the modules it imports
+            total += int(cumulative)
+
+    return total, times
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    for target, (folder, imports) in TARGETS.items():
+        results = [import_times(folder, imports) for _ in range(runs)]
+
+        totals = [total / 1000 for total, _ in results]
+        times = results[-1][1]
+        heaviest = sorted([module for module in times if '.' not in module and module != imports.split()[1]],
+                          key=lambda module: -times[module])[:5]   # Packages, without the imported module itself
+        loaded = [module for module in HEAVY_MODULES if module in times]
+
+        print(f'{target}: {statistics.median(totals):.0f} ms median of {runs} runs, {len(times)} modules')
+        print(f'    heaviest: {", ".join(f"{module} {times[module] / 1000:.0f} ms" for module in heaviest)}')
+        print(f'    heavy dependencies loaded: {", ".join(loaded) or "none"}')
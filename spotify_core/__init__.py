@@ -0,0 +1,9 @@
+'''
+Pieces shared by the extractors of the app and of utils, so both of them call the API the same way:
+    · limiter: the token bucket shared by all the calls of the process
+    · credentials: the client credentials token shared by all the extractions
+    · cache: the SQLite cache of the artists and audio features
+    · transport: the HTTP client, the retries and the coalescing of the calls
+    · flatten: the getters that read the fields of the API items, and the check of the items that are not tracks
+Nothing here reads the variables of the app or of utils: every root creates its own instances with its variables.
+'''
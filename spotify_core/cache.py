@@ -0,0 +1,96 @@
+import json
+import sqlite3
+import threading
+from time import time
+
+class ItemCache():
+    '''
+    This class stores the API items (artists, audio features) in a local SQLite file, under their Spotify id,
+    so they are only requested once and reused in the next extractions.
+        · Every kind of item has its own time to live, after which it's requested again
+        · When there are more than maxItems items, the least recently used ones are removed
+        · The hits and misses are counted, so we know how many calls the cache is saving
+    '''
+    def __init__(self, path, ttl, maxItems):
+        self.path = path
+        self.ttl = ttl   # Seconds every kind of item is kept, as a dictionary
+        self.maxItems = maxItems
+
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = None   # The file is opened with the first call
+        self.lock = threading.Lock()
+
+
+    def connect(self):
+        '''
+        This function will open the SQLite file and create the table, if it's not already open
+        '''
+        if self.connection is None:
+            # The file can be shared by several processes (sharded extraction): they wait up to a minute for the
+            # writes of the others, and with WAL they can read while another one writes
+            self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('''CREATE TABLE IF NOT EXISTS items (
+                                           kind TEXT, id TEXT, data TEXT, stored REAL, used REAL,
+                                           PRIMARY KEY (kind, id))''')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS items_used ON items (used)')
+
+        return self.connection
+
+
+    def getMany(self, kind, ids):
+        '''
+        This function will return a dictionary with the items of the given kind and ids that are stored and not expired
+        '''
+        ids = list(dict.fromkeys(ids))   # Every id is only counted once
+
+        items = {}
+
+        with self.lock:
+            connection = self.connect()
+            now = time()
+
+            for start in range(0, len(ids), 500):   # SQLite limits the number of parameters of every query
+                batch = ids[start:start + 500]
+                rows = connection.execute(f'SELECT id, data FROM items WHERE kind = ? AND stored > ? AND id IN ({",".join("?" * len(batch))})',
+                                          [kind, now - self.ttl.get(kind, 0)] + batch)
+
+                for item_id, data in rows:
+                    items[item_id] = json.loads(data)
+
+            connection.executemany('UPDATE items SET used = ? WHERE kind = ? AND id = ?',
+                                   [(now, kind, item_id) for item_id in items])   # The items have been used now
+            connection.commit()
+
+            self.hits += len(items)
+            self.misses += len(ids) - len(items)
+
+        return items
+
+
+    def setMany(self, kind, items):
+        '''
+        This function will store the given dictionary of items, and remove the least recently used ones if there are too many
+        '''
+        with self.lock:
+            connection = self.connect()
+            now = time()
+
+            connection.executemany('INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)',
+                                   [(kind, item_id, json.dumps(item), now, now) for item_id, item in items.items()])
+
+            extra = connection.execute('SELECT COUNT(*) FROM items').fetchone()[0] - self.maxItems
+
+            if extra > 0:
+                connection.execute('DELETE FROM items WHERE rowid IN (SELECT rowid FROM items ORDER BY used LIMIT ?)', (extra,))
+
+            connection.commit()
+
+
+    def report(self):
+        '''
+        This function will return a summary of the calls the cache has saved
+        '''
+        return f'Cache hits {self.hits}, misses {self.misses}'
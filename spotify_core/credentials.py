@@ -0,0 +1,105 @@
+import threading
+from time import monotonic
+
+import requests
+
+class TokenManager():
+    '''
+    This class keeps the client credentials token of the process, so it's shared by all the extractions
+    instead of asking for a new one in every request.
+        · The token is refreshed refreshMargin seconds before it expires, so long extractions don't fail
+        · When several threads need a new token at the same time, only one of them asks for it
+        · The token can be exported to other processes (sharded extraction), and used as the spotipy credentials manager
+    '''
+    def __init__(self, authURL, clientID, clientSecret, refreshMargin):
+        self.authURL = authURL
+        self.clientID = clientID
+        self.clientSecret = clientSecret
+        self.refreshMargin = refreshMargin   # Seconds before the token expires when a new one is requested
+
+        self.headers = None   # Headers with the current token
+        self.expiresAt = 0   # Time when the current token has to be refreshed
+
+        self.refreshes = 0   # Number of tokens requested
+        self.lock = threading.Lock()
+
+
+    def validHeaders(self):
+        '''
+        This function will return the headers with the current token, or None if it has to be refreshed
+        '''
+        headers = self.headers
+
+        if headers is not None and monotonic() < self.expiresAt:
+            return headers
+
+        return None
+
+
+    def getHeaders(self):
+        '''
+        This function will return the personalised headers to get data from the API, refreshing the token if needed
+        Needed personal variables: client_id, client_secret
+        '''
+        headers = self.validHeaders()   # Most of the calls don't need to wait for the lock
+
+        if headers is not None:
+            return headers
+
+        with self.lock:
+            if self.validHeaders() is None:   # Another thread could have refreshed it while we were waiting
+                self.refresh()
+
+            return self.headers
+
+
+    def refresh(self):
+        '''
+        This function will ask for a new token and save it, with the time it has to be refreshed
+        '''
+        authResponse = requests.post(self.authURL, {'grant_type': 'client_credentials',
+                                                    'client_id': self.clientID,
+                                                    'client_secret': self.clientSecret,})
+
+        authResponseData = authResponse.json()   # convert the response to JSON
+
+        self.headers = {'Authorization': 'Bearer {token}'.format(token=authResponseData['access_token'])}
+        self.expiresAt = monotonic() + authResponseData.get('expires_in', 3600) - self.refreshMargin
+        self.refreshes += 1
+
+
+    def get_access_token(self, as_dict=False):
+        '''
+        This function will return just the token, so the manager can also be used as the spotipy credentials manager
+        The name and arguments are the ones spotipy calls
+        '''
+        return self.getHeaders()['Authorization'].replace('Bearer ', '')
+
+
+    def exportToken(self):
+        '''
+        This function will return the headers with the current token and the seconds until it has to be refreshed,
+        so other processes can use the same token instead of asking for their own
+        '''
+        headers = self.getHeaders()
+
+        return headers, self.expiresAt - monotonic()
+
+
+    def importToken(self, headers, seconds):
+        '''
+        This function will use the headers exported by another process, until they have to be refreshed
+        '''
+        with self.lock:
+            self.headers = headers
+            self.expiresAt = monotonic() + seconds
+
+
+    def invalidate(self, headers):
+        '''
+        This function will force a refresh after the API has rejected the given headers
+        If the token has already been refreshed by another thread, nothing is done
+        '''
+        with self.lock:
+            if self.headers is headers:
+                self.expiresAt = 0
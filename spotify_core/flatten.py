@@ -0,0 +1,111 @@
+from operator import itemgetter
+
+def getPath(item, path):
+    '''
+    This function will return the value at the given path of an item, e.g. ('track', 'album', 'name'), or None if the
+    item doesn't have it
+    '''
+    try:
+        for key in path:
+            item = item[key]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+    return item
+
+
+def addFields(features, item, fields):
+    '''
+    This function will add to the features the value of every field of the item, given the column and the path of
+    every field, e.g. ('album', ('track', 'album', 'name')). The fields that the item doesn't have get None
+    '''
+    for column, path in fields:
+        value = item
+        try:
+            for key in path:   # The keys are read inline, calling getPath for every field costs as much as the field
+                value = value[key]
+        except (KeyError, IndexError, TypeError):
+            value = None
+        features[column] = value
+
+
+class FieldGetter():
+    '''
+    This class reads a list of fields from the API items (playlist items, artists, audio features).
+    Every field of an item is read with its own path, and its values are returned as a tuple, so the compact items
+    only keep the values and the columns are known by their position. Missing items and fields are None.
+    The flat items (artists, audio features) are read with a single itemgetter of all their keys, unless some key
+    is missing
+    '''
+    def __init__(self, paths):
+        '''
+        This function will create the getter of the given paths, e.g. ('track', 'album', 'name')
+        A path can be None, and then its value is always None
+        '''
+        self.paths = paths
+        self.missing = (None,) * len(paths)   # Values of a missing item
+
+        flat = len(paths) > 1 and all(path is not None and len(path) == 1 for path in paths)
+        self.itemGetter = itemgetter(*[path[0] for path in paths]) if flat else None   # Getter of all the keys of a flat item
+
+
+    def values(self, item):
+        '''
+        This function will return a tuple with the value of every field of a single item
+        '''
+        if item is None:
+            return self.missing
+
+        if self.itemGetter is not None:
+            try:
+                return self.itemGetter(item)
+            except (KeyError, TypeError):   # Some keys are missing, they are read one by one
+                pass
+
+        return tuple([getPath(item, path) for path in self.paths])
+
+
+    def rows(self, items):
+        '''
+        This function will return a list with a tuple with the value of every field of every item
+        '''
+        return [self.values(item) for item in items]
+
+
+def skippedKind(item):
+    '''
+    This function will return 'local file' or 'episode' if the playlist item is not a Spotify track, or None if it is
+    Local files don't have ids, and episodes have ids that are not tracks, so none of them can be extracted
+    '''
+    track = (item or {}).get('track') or {}
+
+    if (item or {}).get('is_local') or track.get('is_local'):
+        return 'local file'
+
+    if track.get('type', 'track') != 'track':
+        return 'episode'
+
+    return None
+
+
+def writeFields(tree):
+    '''
+    This function will write a tree of keys with the syntax of the fields parameter of the API, e.g. track(name,album(name))
+    '''
+    return ','.join(key + (f'({writeFields(subtree)})' if subtree else '') for key, subtree in tree.items())
+
+
+def fieldsFilter(paths):
+    '''
+    This function will return the fields parameter that makes the API return only the given paths of every item
+    The list indexes are left out, the fields of a list apply to all its items
+    '''
+    tree = {}
+
+    for path in paths:
+        node = tree
+        for key in path:
+            if isinstance(key, str):
+                node = node.setdefault(key, {})
+
+    return writeFields(tree)
@@ -0,0 +1,123 @@
+import asyncio
+import random
+import threading
+from time import monotonic, sleep
+
+class RateLimiter():
+    '''
+    This class is a token bucket shared by all the calls to the API, whatever thread or coroutine they come from.
+    Every call takes a token, and the tokens come back at a rate that adapts to the API answers:
+        · a 429 response halves the rate, and pauses every call during the Retry-After seconds
+        · every successful call slowly raises the rate again, up to the maximum rate
+    It also keeps the time that the calls have spent waiting, so we know how much the API is throttling us
+    '''
+    def __init__(self, maxRate, minRate, burst, increase, backoffBase, maxBackoff):
+        self.maxRate = maxRate   # Calls per second when the API is not throttling us
+        self.minRate = minRate   # The rate is never reduced below this value
+        self.burst = burst   # Maximum number of tokens that can be saved
+        self.increase = increase   # Calls per second recovered after every successful call
+        self.backoffBase = backoffBase   # Seconds waited after the first throttled call, without Retry-After
+        self.maxBackoff = maxBackoff   # Maximum number of seconds waited between retries
+
+        self.rate = maxRate
+        self.tokens = burst
+        self.lastRefill = monotonic()
+        self.pausedUntil = 0   # Time until which every call has to wait after a 429
+
+        self.throttledTime = 0   # Seconds spent waiting, added over all the calls
+        self.throttledResponses = 0   # Number of 429 responses received
+
+        self.lock = threading.Lock()
+
+
+    def reserve(self):
+        '''
+        This function will take a token and return the seconds the caller has to wait before doing the call
+        '''
+        with self.lock:
+            now = monotonic()
+
+            self.tokens = min(self.burst, self.tokens + (now - self.lastRefill) * self.rate)   # Refill the bucket
+            self.lastRefill = now
+
+            self.tokens -= 1   # The token is taken even if it's not there yet, so the next callers queue behind
+
+            wait = max(-self.tokens / self.rate, self.pausedUntil - now, 0)
+
+            self.throttledTime += wait
+
+            return wait
+
+
+    def acquire(self):
+        '''
+        This function will block the thread until a call can be done
+        '''
+        sleep(self.reserve())
+
+
+    async def acquireAsync(self):
+        '''
+        This function will wait, without blocking the event loop, until a call can be done
+        '''
+        await asyncio.sleep(self.reserve())
+
+
+    def success(self):
+        '''
+        This function will slowly raise the rate after every successful call
+        '''
+        with self.lock:
+            self.rate = min(self.maxRate, self.rate + self.increase)
+
+
+    def throttle(self, retryAfter, attempt):
+        '''
+        This function will register a 429 (or server error) response, and pause every call before the next retry
+        If the API sends a Retry-After header, every call waits until it has passed. If not, the wait grows
+        exponentially with the attempt. A random jitter avoids that all the waiting calls retry at the same time.
+        '''
+        try:
+            wait = float(retryAfter)
+        except (TypeError, ValueError):
+            wait = min(self.maxBackoff, self.backoffBase * 2 ** attempt)
+
+        wait += random.uniform(0, self.backoffBase)   # Jitter
+
+        with self.lock:
+            now = monotonic()
+
+            if now >= self.pausedUntil:   # The calls that were already sent during a pause don't slow us down again
+                self.rate = max(self.minRate, self.rate / 2)   # The API says we are going too fast
+
+            self.pausedUntil = max(self.pausedUntil, now + wait)
+            self.throttledResponses += 1
+
+
+    def share(self, parts):
+        '''
+        This function will keep only a part of the rate and the burst, when the limit is shared by several processes,
+        so all of them together don't go over it
+        '''
+        with self.lock:
+            self.maxRate /= parts
+            self.minRate = min(self.minRate, self.maxRate)
+            self.burst = max(1, self.burst / parts)
+
+            self.rate = self.maxRate
+            self.tokens = min(self.tokens, self.burst)
+
+
+    def report(self):
+        '''
+        This function will return a summary of how much we have been throttled
+        '''
+        return (f'Throttled {self.throttledTime:.1f}s, {self.throttledResponses} responses with status 429 or 5xx, '
+                f'current rate {self.rate:.1f} calls/s')
+
+
+def isThrottled(statusCode):
+    '''
+    This function will tell if a response should be retried: too many requests or a server error
+    '''
+    return statusCode == 429 or statusCode >= 500
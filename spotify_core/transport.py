@@ -0,0 +1,436 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from time import perf_counter
+
+import requests
+
+from spotify_core.limiter import *
+
+class ApiResponse():
+    '''
+    This class keeps the status code and the content of a finished API response, so it can be
+    checked the same way as a requests response once the connection has been released
+    '''
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+
+    def json(self):
+        return self.content
+
+
+class InFlightItems():
+    '''
+    This class keeps the items of the multi-id endpoints (artists, audio-features) that are being requested, so every
+    id is only requested once at the same time in the whole process (single-flight by id):
+        · The ids that nobody is requesting are claimed by the caller, which sends them in batches
+        · The ids that another call is already requesting are not sent again, their items are awaited
+    The dedupe ratio is the share of the ids that got the item requested by another call, instead of being sent
+    '''
+    def __init__(self, countItems=None):
+        self.countItems = countItems   # Function called with the endpoint, and the ids requested and coalesced by every call
+        self.inFlight = {}   # Future of every item being requested, under its endpoint and id
+
+        self.requested = 0   # Ids asked to the multi-id endpoints
+        self.coalesced = 0   # Ids that got the item requested by another call
+
+        self.lock = threading.Lock()
+
+
+    def claim(self, url_string, ids):
+        '''
+        This function will return a list with the ids that nobody is requesting, which are now requested by the
+        caller, and a dictionary with the Future of every id that another call is requesting
+        '''
+        claimed = []
+        waiting = {}
+
+        with self.lock:
+            for url_id in dict.fromkeys(ids):   # Every id is only requested once
+                inFlight = self.inFlight.get((url_string, url_id))
+
+                if inFlight is None:
+                    self.inFlight[(url_string, url_id)] = Future()
+                    claimed.append(url_id)
+                else:
+                    waiting[url_id] = inFlight
+
+            self.requested += len(claimed) + len(waiting)
+            self.coalesced += len(waiting)
+
+        if self.countItems is not None:
+            self.countItems(url_string, len(claimed) + len(waiting), len(waiting))
+
+        return claimed, waiting
+
+
+    def release(self, url_string, ids, statusCode=None, items=None, error=None):
+        '''
+        This function will give the status code of the call and the item of every id (None if the API doesn't know it)
+        to the calls waiting for them, or the error of the call, and forget the ids
+        '''
+        items = items or {}
+
+        with self.lock:
+            futures = [self.inFlight.pop((url_string, url_id)) for url_id in ids]
+
+        for url_id, inFlight in zip(ids, futures):
+            if error is not None:
+                inFlight.set_exception(error)
+            else:
+                inFlight.set_result((statusCode, items.get(url_id)))
+
+
+    def getSeveral(self, url_string, ids, batchSize, get, store=None):
+        '''
+        This function will request the items of the given ids from a multi-id endpoint, with the get function, which
+        sends a call with the given parameters and returns its response
+        The ids nobody is requesting are sent in batches of batchSize ids, and then the rest are awaited
+        The items of every batch are given to the store function, e.g. to save them in the cache, before the calls
+        waiting for them get them
+        It returns a dictionary with the items under their ids, and a list with the ids and the status code of the
+        calls that failed
+        '''
+        claimed, waiting = self.claim(url_string, ids)
+
+        items = {}
+        failedBatches = []
+
+        for start in range(0, len(claimed), batchSize):
+            batch = claimed[start:start + batchSize]
+
+            try:
+                response = get({'ids': ','.join(batch)})
+                content = response.json() if response.status_code == 200 else None   # The body of an error may not be JSON
+                items.update(self.storeBatch(url_string, batch, response.status_code, content, store))
+            except Exception as error:   # The waiting calls get the same error, and the rest are not requested
+                self.release(url_string, claimed[start:], error=error)
+                raise
+
+            if response.status_code != 200:
+                failedBatches.append((batch, response.status_code))
+
+        self.storeAwaited(items, failedBatches, {url_id: inFlight.result() for url_id, inFlight in waiting.items()})
+
+        return items, failedBatches
+
+
+    def storeBatch(self, url_string, batch, statusCode, content, store):
+        '''
+        This function will read the items of a batch response, store them and give them to the waiting calls
+        The items come under the name of the endpoint, e.g. 'audio_features', and the unknown ids are returned as None
+        '''
+        batchItems = {}
+
+        if statusCode == 200:
+            for item in content.get(url_string.replace('-', '_')) or []:
+                if item is not None:
+                    batchItems[item['id']] = item
+
+        if store is not None and batchItems:
+            store(batchItems)
+
+        self.release(url_string, batch, statusCode, batchItems)   # The items are stored before the waiting calls get them
+
+        return batchItems
+
+
+    def storeAwaited(self, items, failedBatches, results):
+        '''
+        This function will add the status code and the item of every awaited id to the items and the failed batches
+        The awaited ids of the failed calls are grouped by status code
+        '''
+        failedIDs = {}
+
+        for url_id, (statusCode, item) in results.items():
+            if statusCode != 200:
+                failedIDs.setdefault(statusCode, []).append(url_id)
+            elif item is not None:
+                items[url_id] = item
+
+        failedBatches.extend((batch, statusCode) for statusCode, batch in failedIDs.items())
+
+
+    def dedupeRatio(self):
+        '''
+        This function will return the share of the ids that were coalesced
+        '''
+        return self.coalesced / self.requested if self.requested else 0.0
+
+
+def endpointName(url_string):
+    '''
+    This function will return the endpoint of a call without the ids, so playlists/<id>/tracks is playlists/tracks
+    '''
+    return '/'.join(url_string.split('/')[::2])
+
+
+class Transport():
+    '''
+    This class sends the calls to the API of all the extractions of the process:
+        · The calls are multiplexed over HTTP/2 with httpx, so the concurrent calls share the same connection to
+          the API instead of opening one each. Without the httpx and h2 packages (or with http2=False) a requests
+          session is used, which at least keeps the connections open between calls
+        · Every call waits for its turn in the shared rate limiter, uses the shared token, and is retried when it's
+          throttled or the token has expired
+        · The calls to the same URL with the same parameters are coalesced while one of them is in flight: only the
+          first one is sent, and the rest wait for its response (single-flight)
+        · The multi-id calls (artists, audio-features) are coalesced by id with InFlightItems: only the ids that no
+          other call is requesting are sent, so two extractions with the same artists don't request them twice
+    The dedupe ratio is the share of the calls (or of the ids) that got the response of a call in flight, instead of
+    being sent. The errors of httpx are raised as requests errors, so the callers catch the same ones with both clients
+    The calls can be timed with a metrics object, which has the wait and call methods of RequestMetrics
+    '''
+    def __init__(self, baseURL, rateLimiter, tokenManager, maxRetries, http2, maxConnections):
+        self.baseURL = baseURL   # Base URL of all Spotify API endpoints
+        self.rateLimiter = rateLimiter
+        self.tokenManager = tokenManager
+        self.maxRetries = maxRetries   # Number of times a throttled call is repeated
+        self.http2 = http2
+        self.maxConnections = maxConnections
+
+        self.client = None   # HTTP client, created with the first call
+        self.protocol = None   # 'HTTP/2' or 'HTTP/1.1', known once the client is created
+        self.clientErrors = ()   # Errors of the client that are raised as requests errors
+        self.inFlight = {}   # Future of every call being sent, under its URL and parameters
+        self.items = InFlightItems(self.countItems)   # Items of the multi-id calls being sent
+
+        self.requested = 0   # Calls asked to the transport
+        self.coalesced = 0   # Calls that got the response of a call in flight
+
+        self.lock = threading.Lock()
+
+
+    def createClient(self):
+        '''
+        This function will create the HTTP/2 client, or the requests session if httpx or h2 are not installed
+        '''
+        if self.http2:
+            try:
+                import h2   # Needed by httpx to speak HTTP/2
+                import httpx
+            except ImportError:
+                pass
+            else:
+                self.protocol = 'HTTP/2'
+                self.clientErrors = httpx.HTTPError
+                return httpx.Client(http2=True, limits=httpx.Limits(max_connections=self.maxConnections))
+
+        self.protocol = 'HTTP/1.1'
+        session = requests.Session()
+        session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=self.maxConnections))
+
+        return session
+
+
+    def send(self, url, headers=None, params=None):
+        '''
+        This function will send a GET with the shared client and return the response, which can be read the same way
+        with httpx and requests (status_code, headers, json)
+        The connection errors and timeouts of httpx are raised as a requests.RequestException
+        '''
+        with self.lock:
+            if self.client is None:
+                self.client = self.createClient()
+
+        try:
+            return self.client.get(url, headers=headers, params=params)
+        except self.clientErrors as error:
+            raise requests.RequestException(repr(error), request=None) from error
+
+
+    def retry(self, url_string, parameters=None, metrics=None):
+        '''
+        This function will send a call to the API with the shared client, and return the response
+        Every call waits for its turn in the shared rate limiter, and throttled calls are retried
+        '''
+        for attempt in range(self.maxRetries + 1):
+            start = perf_counter()
+            self.rateLimiter.acquire()   # Wait until the call can be done
+            if metrics is not None:
+                metrics.wait(perf_counter() - start)
+
+            headers = self.tokenManager.getHeaders()   # The token may have been refreshed during the extraction
+
+            start = perf_counter()
+            response = self.send(self.baseURL + url_string, headers, parameters)
+            if metrics is not None:
+                metrics.call(endpointName(url_string), perf_counter() - start, response.status_code, attempt)
+
+            if response.status_code == 401:   # The token has expired, the next call will use a new one
+                self.tokenManager.invalidate(headers)
+
+            elif not isThrottled(response.status_code):
+                self.rateLimiter.success()
+                break
+
+            else:
+                self.rateLimiter.throttle(response.headers.get('Retry-After'), attempt)   # The next call waits for the backoff
+
+        return response
+
+
+    def get(self, url_string, parameters=None, metrics=None):
+        '''
+        This function will do a call to the API and return the response, unless the same call is already in flight,
+        and then its response is awaited
+        '''
+        return self.coalesce(url_string, parameters, lambda: self.retry(url_string, parameters, metrics))
+
+
+    def getSeveral(self, url_string, ids, batchSize, store=None, metrics=None):
+        '''
+        This function will request the items of the given ids from a multi-id endpoint, in batches of batchSize ids
+        Only the ids that no other call is requesting are sent, the items of the rest are awaited
+        It returns a dictionary with the items under their ids, and a list with the ids and the status code of the
+        calls that failed. The items that are sent are given to the store function first
+        '''
+        return self.items.getSeveral(url_string, ids, batchSize,
+                                     lambda parameters: self.retry(url_string, parameters, metrics), store)
+
+
+    async def getSeveralAsync(self, session, url_string, ids, batchSize, store=None, metrics=None, baseURL=None):
+        '''
+        This function will do the same as getSeveral through the given aiohttp session, with all the batches at once
+        '''
+        claimed, waiting = self.items.claim(url_string, ids)
+
+        batches = [claimed[start:start + batchSize] for start in range(0, len(claimed), batchSize)]
+
+        items = {}
+        failedBatches = []
+        released = 0   # Number of claimed ids already given to the waiting calls
+
+        try:
+            responses = await asyncio.gather(*[self.getAsync(session, url_string, {'ids': ','.join(batch)}, metrics, baseURL)
+                                               for batch in batches])
+
+            for batch, response in zip(batches, responses):   # getAsync only reads the body of the successful calls
+                items.update(self.items.storeBatch(url_string, batch, response.status_code, response.json(), store))
+                released += len(batch)
+
+                if response.status_code != 200:
+                    failedBatches.append((batch, response.status_code))
+
+        except Exception as error:   # The waiting calls get the same error
+            self.items.release(url_string, claimed[released:], error=error)
+            raise
+
+        results = await asyncio.gather(*[asyncio.wrap_future(inFlight) for inFlight in waiting.values()])
+
+        self.items.storeAwaited(items, failedBatches, dict(zip(waiting, results)))
+
+        return items, failedBatches
+
+
+    async def getAsync(self, session, url_string, parameters=None, metrics=None, baseURL=None):
+        '''
+        This function will do a call to the API through the given aiohttp session, and return an ApiResponse
+        Only the body of the successful calls is read, the failed ones have None as content
+        The calls wait in the same rate limiter and use the same token as the rest, and throttled calls are retried
+        The base URL of the transport is used unless another one is given
+        '''
+        for attempt in range(self.maxRetries + 1):
+            start = perf_counter()
+            await self.rateLimiter.acquireAsync()   # Wait until the call can be done
+            if metrics is not None:
+                metrics.wait(perf_counter() - start)
+
+            headers = await self.getHeadersAsync()   # The token may have been refreshed during the extraction
+
+            start = perf_counter()
+            async with session.get((baseURL or self.baseURL) + url_string, headers=headers, params=parameters) as response:
+                content = await response.json(content_type=None) if response.status == 200 else None   # The body of an error may not be JSON
+                apiResponse = ApiResponse(response.status, content)
+                retryAfter = response.headers.get('Retry-After')
+            if metrics is not None:
+                metrics.call(endpointName(url_string), perf_counter() - start, apiResponse.status_code, attempt)
+
+            if apiResponse.status_code == 401:   # The token has expired, the next call will use a new one
+                self.tokenManager.invalidate(headers)
+
+            elif not isThrottled(apiResponse.status_code):
+                self.rateLimiter.success()
+                break
+
+            else:
+                self.rateLimiter.throttle(retryAfter, attempt)   # The next call waits for the backoff
+
+        return apiResponse
+
+
+    async def getHeadersAsync(self):
+        '''
+        This function will return the headers with the shared token. The token is only requested when it's about to
+        expire, and then the request is done in a thread, so the event loop is not blocked
+        '''
+        return self.tokenManager.validHeaders() or await asyncio.to_thread(self.tokenManager.getHeaders)
+
+
+    def countRequest(self, url_string, coalesced):
+        '''
+        This function is called for every call asked to the transport, telling if it got the response of a call
+        in flight. It does nothing, the app counts the calls in its metrics
+        '''
+
+
+    def countItems(self, url_string, requested, coalesced):
+        '''
+        This function is called for every multi-id request, with the number of ids asked to the transport and the ones
+        that got the item requested by another call. It does nothing, the app counts the ids in its metrics
+        '''
+
+
+    def coalesce(self, url_string, parameters, call):
+        '''
+        This function will return the response of the call to url_string with the given parameters, doing it with
+        the call function unless the same call is already in flight, and then its response is awaited
+        '''
+        key = (url_string, tuple(sorted((parameters or {}).items())))
+
+        with self.lock:
+            self.requested += 1
+            inFlight = self.inFlight.get(key)
+            leader = inFlight is None
+
+            if leader:
+                inFlight = self.inFlight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        self.countRequest(url_string, not leader)
+
+        if not leader:
+            return inFlight.result()
+
+        try:
+            response = call()
+            inFlight.set_result(response)
+
+        except Exception as error:   # The waiting calls get the same error
+            inFlight.set_exception(error)
+            raise
+
+        finally:
+            with self.lock:
+                del self.inFlight[key]
+
+        return response
+
+
+    def dedupeRatio(self):
+        '''
+        This function will return the share of the calls that were coalesced
+        '''
+        return self.coalesced / self.requested if self.requested else 0.0
+
+
+    def report(self):
+        '''
+        This function will return a summary of the calls the transport has saved
+        '''
+        return (f'Transport {self.protocol or "not used"}, {self.requested} calls, {self.coalesced} coalesced, '
+                f'dedupe ratio {self.dedupeRatio():.2f}, {self.items.requested} ids, {self.items.coalesced} coalesced, '
+                f'dedupe ratio {self.items.dedupeRatio():.2f}')
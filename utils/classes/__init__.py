@@ -0,0 +1,5 @@
+'''
+Classes of the extractors of utils. The pieces shared with the extractors of the app (rate limiter, token manager,
+item cache, transport and the getters of flatten) are in the spotify_core package, which is installed from the
+repository folder with pip install -e .
+'''
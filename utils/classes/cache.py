@@ -0,0 +1,4 @@
+from spotify_core.cache import *
+from variables import *
+
+item_cache = ItemCache(cache_path, cache_ttl, cache_max_items)   # Cache shared by all the extractions of the process
@@ -0,0 +1,4 @@
+from spotify_core.credentials import *
+from variables import *
+
+token_manager = TokenManager(AUTH_URL, CLIENT_ID, CLIENT_SECRET, token_refresh_margin)   # Token shared by all the extractions of the process
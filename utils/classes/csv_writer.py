@@ -0,0 +1,44 @@
+from variables import *
+
+class Csv_writer():
+    '''
+    This class writes the extracted tracks into a csv file. It has the same methods as Parquet_writer, so the
+    extractors don't need to know the format of the resulting file.
+    A csv file can't be written by parts with the right columns, so the tracks are kept until the file is closed.
+    '''
+    def __init__(self, path, extra_columns=None, columns=None, key_column='track_id'):
+        '''
+        This function will create the empty lists of tracks. The columns are the features of the tracks,
+        so the columns and extra columns don't need to be given
+        The column of the keys is only named when it's not the track id, the files of tracks keep their header
+        '''
+        self.path = path
+        self.key_column = key_column
+        self.track_ids = []   # Index of the rows, the same track can be written several times
+        self.rows = []
+
+
+    def write(self, track_id, all_track_features):
+        '''
+        This function will add a track to the file
+        '''
+        self.track_ids.append(track_id)
+        self.rows.append(all_track_features)
+
+
+    def write_dict(self, track_data):
+        '''
+        This function will add all the tracks of a nested dictionary, stored under their track id
+        '''
+        for track_id, all_track_features in track_data.items():
+            self.write(track_id, all_track_features)
+
+
+    def close(self):
+        '''
+        This function will transform the tracks into a dataframe and save it as a csv file
+        '''
+        import pandas as pd   # Only loaded when a csv file is saved
+
+        track_data_df = pd.DataFrame.from_records(self.rows, index=self.track_ids)
+        track_data_df.to_csv(self.path, index_label=None if self.key_column == 'track_id' else self.key_column)
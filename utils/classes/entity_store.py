@@ -0,0 +1,87 @@
+import json
+import sqlite3
+import threading
+from time import time
+
+from variables import *
+
+class Entity_store():
+    '''
+    This class keeps the artists and albums of all the normalized datasets in a local SQLite file, with a table for
+    every kind of entity and a column for every feature, so every artist and album is stored only once.
+        · The artist and album tables of the datasets are written from it, so they always have the latest values
+        · A value that is missing in an extraction (e.g. the artists call failed) doesn't replace the stored one
+        · The entities are kept between runs, the file can be queried and shared by several processes
+    '''
+    # Table of every kind of entity, with the column of its id and the columns of its features
+    tables = {'artists': ('artist_id', ['artist_name', 'artist_genres', 'artist_popularity']),
+              'albums': ('album_id', ['album', 'album_cover'])}
+
+    json_columns = ['artist_genres']   # Lists, they are stored as JSON
+
+    def __init__(self, path=entity_path):
+        self.path = path
+
+        self.connection = None   # The file is opened with the first call
+        self.lock = threading.Lock()
+
+
+    def connect(self):
+        '''
+        This function will open the SQLite file and create the tables, if it's not already open
+        '''
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')   # Several processes can read while another one writes
+
+            for kind, (id_column, columns) in self.tables.items():
+                self.connection.execute(f'''CREATE TABLE IF NOT EXISTS {kind} (
+                                                {id_column} TEXT PRIMARY KEY, {", ".join(columns)}, stored REAL)''')
+
+        return self.connection
+
+
+    def set_many(self, kind, entities):
+        '''
+        This function will store the given dictionary of entities of a kind, with their features under their id
+        The missing features (None) keep the value that was already stored
+        '''
+        id_column, columns = self.tables[kind]
+
+        rows = [[entity_id] + [json.dumps(entity.get(column)) if column in self.json_columns and entity.get(column) is not None
+                               else entity.get(column) for column in columns] + [time()]
+                for entity_id, entity in entities.items()]
+
+        with self.lock:
+            connection = self.connect()
+            connection.executemany(f'''INSERT INTO {kind} VALUES ({", ".join("?" * (len(columns) + 2))})
+                                       ON CONFLICT ({id_column}) DO UPDATE SET stored = excluded.stored, '''
+                                   + ', '.join(f'{column} = COALESCE(excluded.{column}, {column})' for column in columns), rows)
+            connection.commit()
+
+
+    def get_many(self, kind, ids):
+        '''
+        This function will return a dictionary with the features of the stored entities of the given kind and ids
+        '''
+        id_column, columns = self.tables[kind]
+        ids = list(dict.fromkeys(ids))
+
+        entities = {}
+
+        with self.lock:
+            connection = self.connect()
+
+            for start in range(0, len(ids), 500):   # SQLite limits the number of parameters of every query
+                batch = ids[start:start + 500]
+                rows = connection.execute(f'SELECT {id_column}, {", ".join(columns)} FROM {kind} '
+                                          f'WHERE {id_column} IN ({",".join("?" * len(batch))})', batch)
+
+                for entity_id, *values in rows:
+                    entities[entity_id] = {column: json.loads(value) if column in self.json_columns and value is not None else value
+                                           for column, value in zip(columns, values)}
+
+        return entities
+
+
+entity_store = Entity_store()   # Artists and albums shared by all the extractions of the process
@@ -1,13 +1,38 @@
-import pandas as pd
-import spotipy
+import json
+import os
 import requests
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from classes.cache import *
+from classes.credentials import *
+from classes.csv_writer import *
+from classes.ndjson_writer import *
+from classes.normalized_writer import *
+from classes.parquet_writer import *
+from classes.http2_transport import *
+from spotify_core.flatten import *
 from variables import *
 
+# Path of every main feature inside a playlist item, read with the getters of spotify_core
+track_paths = {**{'track_' + feature: ('track', feature) for feature in track_features_list},
+               'artist_name': ('track', 'artists', 0, 'name'),
+               'album': ('track', 'album', 'name'),
+               'album_cover': ('track', 'album', 'images', 0, 'url')}
+
+ids_getter = FieldGetter([('track', 'uri'), ('track', 'artists', 0, 'uri'), ('track', 'album', 'id'), ('track', 'id')])   # Uris and ids of a playlist item
+
+artist_getter = FieldGetter([(feature,) for feature in artist_features_list])   # Features of an artist
+audio_features_getter = FieldGetter([(feature,) for feature in audio_features_list])   # Audio features of a track
+
 class Extract_all():
     '''
     This class contains all the necessary data to extract all the tracks from a given playlist, store the 
     track details, and save it into a csv file.
+    It's the core of all the extractors, which go through the same steps:
+        · fetch: get the pages of the playlist (get_page, get_all_tracks)
+        · flatten: extract the data that is already in the pages (extract_pending_tracks)
+        · enrich: add the artists and audio features, requested in batches (api_call_several, enrich_tracks)
+        · sink: save the tracks with the writer of the output format (open_writer)
+    Every call goes through the transport, so the same steps can be done with HTTP/2, requests or spotipy
     '''
     # Track features that we can import using the same syntax
     track_features_list = track_features_list   # Track name and track popularity
@@ -16,25 +41,43 @@ class Extract_all():
 
     audio_features_list = audio_features_list   # Audio features 
 
+    item_paths = track_paths   # Path of every feature read from the playlist items, under its column
+
+    artist_columns = ['artist_' + feature for feature in artist_features_list]   # Columns of the artist features
+
+    page_size = page_size   # Tracks returned in every playlist page
+
+    page_fields = page_fields   # Fields of the playlist pages that are requested
+
+    pagination_workers = pagination_workers   # Playlist pages requested at the same time
+
+    artist_batch_size = artist_batch_size   # Artists requested in every call
+
+    audio_features_batch_size = audio_features_batch_size   # Audio features requested in every call
+
+    output_folder = output_folder   # Folder of the resulting file
+
+    output_format = output_format   # Format of the resulting file, 'csv', 'parquet' or 'ndjson'
+
+    output_layout = output_layout   # 'flat' or 'normalized' (separate track, artist, album and playlist tables)
+
+    output_join_view = output_join_view   # With the normalized layout, also save the flat file
+
     CLIENT_ID = CLIENT_ID   # Client id, personal credential
     CLIENT_SECRET = CLIENT_SECRET   # Client secret, personal credential
 
     AUTH_URL = AUTH_URL   # Authorisation URL
 
-    BASE_URL = BASE_URL   # Base URL of all Spotify API endpoints
+    transport = http2_transport   # Transport used for the calls to the API
 
-    track_list = []   # Empty list where we'll add all the tracks from the playlist
-
-    offset = 0   # The offset is set to 0 and it will be increased later
-
-    track_data = {}   # Empty dictionary where all the data will be stored
+    writers = {'csv': Csv_writer, 'parquet': Parquet_writer, 'ndjson': Ndjson_writer}   # Writer of every output format
 
     # playlist_name = 'hola'
     # playlist_genre = 'hola'
     # playlist_link = 'https://open.spotify.com/playlist/37i9dQZF1DX3HYlktiFpE6?si=1b9ce832e69443de'
     # file_name = 'filefilefile'
 
-    def __init__(self):
+    def __init__(self, resume=False):
         '''
         This function will initiate the clase, given the following playlist elements:
             · name
@@ -43,15 +86,43 @@ class Extract_all():
             · name
         It will create the necessary authentifications, extract all the data, 
         store it in dictionaries, and save it as csv
+        Every extracted page is saved in a checkpoint file, with the tracks that failed and why. With resume=True
+        only the file name is asked, the tracks of the checkpoint are kept, and only the failed tracks and the
+        remaining pages are extracted
         '''
         # self.playlist_id = self.playlist_link.split("/")[-1].split("?")[0] 
-        self.get_playlist_data()
+        self.new_state()   # Create the lists and dictionaries of this extraction
+        if resume:
+            self.get_checkpoint_data()   # Recover the playlist elements of the interrupted extraction
+        else:
+            self.get_playlist_data()
+        self.open_output()   # Create the writer, so the tracks are saved as soon as they are extracted
+        if resume:
+            self.read_checkpoint()   # Recover the tracks extracted before
+        else:
+            self.new_checkpoint()   # Start an empty checkpoint
         self.api_response()   # Create the authentification to access data
         self.get_all_tracks()   # Access each of the tracks of the playlist
-        self.extract_all_data()   # Extract all the data which will be stored
-        self.dict_to_df()   # Transform the dictionary into a dataframe
-        self.df_to_csv()   # Save the dataframe as a csv file
-        
+        self.extract_pages()   # Extract all the data which will be stored, saving a checkpoint after every page
+        self.close_output()   # Save the tracks as a csv or parquet file
+        self.save_ledger()   # Save the failed tracks, or remove the checkpoint if there are none
+
+
+    def new_state(self):
+        '''
+        This function will create the empty state of the extraction, so every instance has its own and
+        several extractions can run at the same time
+        '''
+        self.track_list = []   # Empty list where we'll add all the tracks from the playlist
+
+        self.offset = 0   # The offset is set to 0 and it will be increased later
+
+        self.track_data = {}   # Empty dictionary where all the data will be stored
+
+        self.done_offsets = set()   # Offsets of the pages extracted without failures in a previous run, they are not requested again
+
+        self.failed_tracks = []   # Tracks that couldn't be read, with the reason
+
 
     def get_playlist_data(self):
         self.playlist_name = input('Enter the name of the playlist: ')
@@ -62,171 +133,467 @@ class Extract_all():
         self.playlist_id = self.playlist_link.split("/")[-1].split("?")[0] 
 
 
+    def get_checkpoint_data(self):
+        '''
+        This function will ask for the name of the resulting file, and read the rest of the playlist elements from its checkpoint
+        '''
+        self.file_name = input('Enter the name of the resulting file: ')
+
+        with open(self.checkpoint_path()) as checkpoint:
+            playlist = json.loads(checkpoint.readline())   # The first line has the playlist elements
+
+        self.playlist_name = playlist['playlist_name']
+        self.playlist_genre = playlist['playlist_genre']
+        self.playlist_link = playlist['playlist_link']
+        self.playlist_id = self.playlist_link.split("/")[-1].split("?")[0] 
+
+
+    def checkpoint_path(self):
+        '''
+        This function will return the path of the checkpoint file, next to the resulting file
+        '''
+        return self.output_folder + self.file_name + '.checkpoint.jsonl'
+
+
+    def ledger_path(self):
+        '''
+        This function will return the path of the file with the failed tracks, next to the resulting file
+        '''
+        return self.output_folder + self.file_name + '.failed.jsonl'
+
+
+    def new_checkpoint(self):
+        '''
+        This function will create the checkpoint file, starting with the playlist elements
+        '''
+        self.done_tracks = set()   # Ids of the extracted tracks
+        self.failed_pages = {}   # Failed tracks of every extracted page, under its offset
+
+        self.checkpoint = open(self.checkpoint_path(), 'w')
+        self.checkpoint.write(json.dumps({'playlist_name': self.playlist_name,
+                                          'playlist_genre': self.playlist_genre,
+                                          'playlist_link': self.playlist_link}) + '\n')
+        self.checkpoint.flush()
+
+
+    def read_checkpoint(self):
+        '''
+        This function will store the tracks of the checkpoint, and recover the pages and failed tracks of the interrupted extraction
+        A page is extracted again only if some of its tracks failed, and then only those tracks are extracted
+        '''
+        self.done_tracks = set()
+        self.failed_pages = {}
+
+        with open(self.checkpoint_path()) as checkpoint:
+            line = next(checkpoint)   # Playlist elements
+
+            for line in checkpoint:
+                try:
+                    page_checkpoint = json.loads(line)
+                except ValueError:   # The last line may be incomplete if the extraction was interrupted while writing it
+                    continue
+
+                self.store_tracks(page_checkpoint['tracks'])
+                self.failed_pages[page_checkpoint['offset']] = page_checkpoint['failed']   # Only the last run of every page counts
+
+        self.done_offsets = {offset for offset, failed in self.failed_pages.items() if not failed}
+
+        self.checkpoint = open(self.checkpoint_path(), 'a')
+
+        if not line.endswith('\n'):
+            self.checkpoint.write('\n')   # Don't append the next page to the incomplete line
+
+        print(f'Resuming: {len(self.done_tracks)} tracks were already extracted, '
+              f'{sum(len(failed) for failed in self.failed_pages.values())} failed')
+
+
     def api_response(self):
         '''
-        This function will create the persinalised headers to get data from the API
-        Needed personal variables: client_id, client_secret
+        This function will get the persinalised headers to get data from the API
+        The token is shared by all the extractions, it's only requested again when it's about to expire
         '''
-        # create the response from the API
-        auth_response = requests.post(self.AUTH_URL, {'grant_type': 'client_credentials',
-                                                'client_id': self.CLIENT_ID,
-                                                'client_secret': self.CLIENT_SECRET,})
+        self.headers = token_manager.getHeaders()   # The headers are personalised
 
-        auth_response_data = auth_response.json()   # convert the response to JSON
 
-        access_token = auth_response_data['access_token']   # save the access token
+    def api_get(self, url_string, params=None):
+        '''
+        This function will do a call to the API through the transport and return the response
+        Every call waits for its turn in the shared rate limiter, and throttled calls are retried
+        '''
+        return self.transport.get(url_string, params)
 
-        self.headers = {'Authorization': 'Bearer {token}'.format(token=access_token)}   # The headers are personalised
+
+    def get_page(self, offset):
+        '''
+        This function will get the dictionary with the 100 tracks of the playlist starting at the given offset
+        '''
+        track_100 = self.api_get('playlists/' + self.playlist_id + '/tracks', {'offset':offset, 'limit':self.page_size,
+                                                                                'fields':self.page_fields})
+
+        track_dict = track_100.json()   # Return the result as a dictionary
+
+        track_dict.setdefault('offset', offset)   # The error responses don't say which page failed
+
+        return track_dict
 
 
     def get_all_tracks(self):
         '''
         This function will get a list of dictionaries, with all the tracks from the given playlist
+        The first page already tells us the total number of tracks, so the offsets of the remaining pages are
+        known and the pages are requested concurrently, pagination_workers at most at the same time
         '''
-        track_100 = requests.get(self.BASE_URL + 'playlists/' + self.playlist_id + '/tracks',    # Pull playlists tracks 
-                                headers=self.headers, params={'offset':self.offset})             # (first offset, 100) 
-       
-        track_dict = track_100.json()   # Add the result to a dictionary
-    
-        self.track_list.append(track_dict)   # Add this dictionary to the track list
+        track_dict = self.get_page(self.offset)   # Pull playlists tracks (first offset, 100)
 
-        while self.offset < track_dict['total']:   # This loop will pull all the tracks from the playlist
-                                                   # and will add the resulting dictionary to the list
-            self.offset += 100   # Adding 100 to the offset will get the next 100 tracks and we will do a new call
+        if self.offset not in self.done_offsets:
+            self.track_list.append(track_dict)   # Add this dictionary to the track list
 
-            track_100 = requests.get(self.BASE_URL + 'playlists/' + self.playlist_id + '/tracks', 
-                                    headers=self.headers, params={'offset':self.offset})
+        offsets = [offset for offset in range(self.offset + self.page_size, track_dict['total'], self.page_size)
+                   if offset not in self.done_offsets]   # Offsets of the remaining pages
 
-            track_dict = track_100.json()   # Add the result to a dictionary
+        if len(offsets) > 0:
+            with ThreadPoolExecutor(max_workers=min(self.pagination_workers, len(offsets))) as executor:
+                for track_dict in executor.map(self.get_page, offsets):   # map returns the pages in playlist order
+                    self.track_list.append(track_dict)   # Add this dictionary to the track list
 
-            self.track_list.append(track_dict)   # Add this dictionary to the track list
 
+    def api_call_several(self, url_string, url_ids, batch_size, failed_items=None):
+        '''
+        This function will call a multi-id endpoint (artists, audio-features) with batches of ids, and return
+        a dictionary with every returned item stored under its id
+        Only the ids that are not in the cache are requested, and the ids that another extraction of the process
+        is already requesting are not sent again, their items are awaited
+        If a failed_items dictionary is given, the ids of the failed calls are stored in it with the reason
+        '''
+        items = item_cache.getMany(url_string, url_ids)   # Items stored in previous extractions
+
+        new_items, failed_batches = self.transport.getSeveral(url_string, [url_id for url_id in url_ids if url_id not in items],
+                                                              batch_size, lambda batch_items: item_cache.setMany(url_string, batch_items))
+
+        if failed_items is not None:
+            self.store_failed_items(url_string, failed_batches, failed_items)
 
-    def api_call(self, url_string, url_id):
+        items.update(new_items)
+
+        return items
+
+
+    def store_failed_items(self, url_string, failed_batches, failed_items):
         '''
-        This function will do individual calls to the API
+        This function will store every id of the failed calls of a multi-id endpoint in failed_items, with the reason
         '''
-        self.track = requests.get(self.BASE_URL + url_string + '/' + url_id, headers=self.headers)
+        for batch, status_code in failed_batches:
+            for url_id in batch:
+                failed_items[(url_string, url_id)] = f'{url_string} call returned {status_code}'
 
-        self.track = self.track.json()
+
+    def is_skipped(self, item):
+        '''
+        This function will tell if a playlist item is a local file, an episode, or a removed or unavailable track
+        (the API sends its track as null), which can't be extracted
+        '''
+        return item.get('track') is None or skippedKind(item) is not None
 
 
-    def define_track_id(self):
+    def extract_pending_tracks(self, pages, failed_tracks=None):
         '''
-        This function will modify the track name, call the api and return the id of the track
+        This function will read the tracks of the given pages and extract the data that is already in them
+        Every track is read field by field with addFields of spotify_core, instead of a try/except for every feature
+        It returns a list with the track id, the artist id and the features of every track
+        If a failed_tracks list is given, the tracks that can't be read are added to it with the reason, instead of stopping
+        The local files, episodes and removed tracks are skipped, they are not failed tracks since they can never be extracted
         '''
-        self.track_id = self.track['track']['uri']   # Obtain the track id from the track uri
+        pending_tracks = []   # Tracks waiting for the artist and audio features
+
+        item_fields = list(self.item_paths.items())   # Column and path of every feature of the playlist items
+
+        for page in pages:   # Every page is a dictionary with 100 tracks
+
+            for item in page['items']:
+
+                if self.is_skipped(item):
+                    continue
+
+                track_uri, artist_uri, album_id, track_id = ids_getter.values(item)
+
+                if track_uri is None or artist_uri is None:   # Removed tracks don't have all the data
+                    reason = 'The track has no id' if track_uri is None else 'The track has no artist'
+
+                    if failed_tracks is None:
+                        raise ValueError(reason)
+
+                    failed_tracks.append({'track_id': track_id, 'reason': reason})
+                    continue
+
+                track_id = track_uri.replace('spotify:track:', '')   # Remove unnecesary characters from the id
+                artist_id = artist_uri.replace('spotify:artist:', '')
+
+                all_track_features = {'playlist_url': self.playlist_link,   # Store the playlist link and name
+                                      'playlist_name': self.playlist_name}
+                addFields(all_track_features, item, item_fields)   # Store the track main features
 
-        self.track_id = self.track_id.replace('spotify:track:', '')   # Remove unnecesary characters from the id
+                if self.output_layout == 'normalized':   # The tables of the normalized layout are joined by the ids
+                    all_track_features['artist_id'] = artist_id
+                    all_track_features['album_id'] = album_id
 
-        self.track_data[self.track_id] = {}   # Create a new dictionary key with the track id
+                self.track_data[track_id] = {}   # Create a new dictionary key with the track id, in playlist order
 
+                pending_tracks.append((track_id, artist_id, all_track_features))
 
-    def store_playlist_data(self):
+        return pending_tracks
+
+
+    def report_failed_tracks(self):
         '''
-        This function will store the playlist url and name in order to keep the information next to the track
+        This function will print the tracks that couldn't be read and the reason, the rest of the tracks are extracted
         '''
-        self.all_track_features['playlist_url'] = self.playlist_link   # Store the playlist link 
-        self.all_track_features['playlist_name'] = self.playlist_name   # Store the playlist name 
+        if self.failed_tracks:
+            print(f'{len(self.failed_tracks)} tracks could not be extracted: {self.failed_tracks}')
 
 
-    def extract_track_main_features(self):
+    def remove_failed_tracks(self, pending_tracks, failed_items, failed_tracks):
         '''
-        This function will iterate over the main track features and extract them into a dictionary
+        This function will return the pending tracks whose artist and audio features could be requested, and add the
+        rest to failed_tracks with the reason of the call that failed
         '''
-        for feature in self.track_features_list:   # loop over the track main features and store them
-            try:
-                feature_data = self.track['track'][feature]
-                feature = 'track_' + feature
-                self.all_track_features[feature] = feature_data
-            except:
-                self.all_track_features[feature] = None
-            
-        # Artist name
-        try:
-            artist_name = self.track['track']['artists'][0]['name']   # Extract and store the artist name
-            self.all_track_features['artist_name'] = artist_name 
-        except:
-            self.all_track_features['artist_name'] = None
-
-        # Album name
-        try:
-            album = self.track['track']["album"]["name"]   # Extract and store the album name
-            self.all_track_features['album'] = album
-        except: 
-            self.all_track_features['album'] = None 
-
-        # Album cover
-        try:
-            album_cover = self.track['track']["album"]["images"][0]['url']   # Extract and store the album cover
-            self.all_track_features['album_cover'] = album_cover
-        except:
-            self.all_track_features['album_cover'] = None
-
-        self.artist_id = self.track['track']["artists"][0]["uri"]   # Extract the id of the artist 
-        self.artist_id = self.artist_id.replace('spotify:artist:', '')
+        enriched_tracks = []
 
-    
-    def extract_artist_features(self):
+        for track_id, artist_id, all_track_features in pending_tracks:
+            reason = failed_items.get(('artists', artist_id)) or failed_items.get(('audio-features', track_id))
+
+            if reason is None:
+                enriched_tracks.append((track_id, artist_id, all_track_features))
+            else:
+                failed_tracks.append({'track_id': track_id, 'reason': reason})
+
+                if self.track_data.get(track_id) == {}:
+                    del self.track_data[track_id]   # Remove the empty key
+
+        return enriched_tracks
+
+
+    def enrich_tracks(self, pending_tracks, artists, audio_features):
         '''
-        This function will iterate over the main artist features and extract them into a dictionary
+        This function will add the artist and audio features to every pending track, and return the track id and its features
+        The artists and audio features of all the tracks are read at once with the getters of spotify_core, the
+        missing ones get None in every feature
         '''
-        for feature in self.artist_features_list:   # Loop over the artist main features, extract and store the data
-            try:
-                feature_data = self.track[feature]
-                feature = 'artist_' + feature   # Transform the name of the feature to be albe to identify the data   
-                self.all_track_features[feature] = feature_data
-            except:
-                self.all_track_features[feature] = None 
+        artist_rows = artist_getter.rows([artists.get(artist_id) for _, artist_id, _ in pending_tracks])
+        audio_features_rows = audio_features_getter.rows([audio_features.get(track_id) for track_id, _, _ in pending_tracks])
+
+        for (track_id, _, all_track_features), artist, track_audio_features in zip(pending_tracks, artist_rows, audio_features_rows):
 
+            all_track_features.update(zip(self.artist_columns, artist))   # Store the artist main features
 
-    def extract_track_audio_features(self):
+            all_track_features.update(zip(self.audio_features_list, track_audio_features))   # Store the audio features
+
+            all_track_features['genre'] = self.playlist_genre   # Add the genre of the list to the dict 
+
+            yield track_id, all_track_features
+
+
+    def store_track_data(self, pending_tracks, artists, audio_features):
         '''
-        This function will iterate over all the audio features and extract them into a dictionary
+        This function will add the artist and audio features to every pending track, and store it into the nested dictionary
         '''
-        for feature in self.audio_features_list:   # Loop over the audio feature list, extract and store the data
-            try:
-                feature_data = self.track[feature] 
-                self.all_track_features[feature] = feature_data
-            except:
-                self.all_track_features[feature] = None 
+        for self.track_id, self.all_track_features in self.enrich_tracks(pending_tracks, artists, audio_features):
+
+            self.dict_into_dict()   # Add the data into the nested dictionary, under the specific track id key
 
 
     def extract_all_data(self):
         '''
         This function will loop over all the tracks, extract all their data, and store it into a nested dictionary
-        Since we have added dictionaries into track_list, and every dictionary has 100 tracks, 
-        we need to iterate over each of them
+        The artist and audio features are not requested track by track: the ids are collected first, and
+        then requested in batches to the multi-id endpoints
         '''
-        loops = (len(self.track_list) - 1)   # Loops will be equal to the number of dictionaries in the list, minus 1
+        pending_tracks = self.extract_pending_tracks(self.track_list, self.failed_tracks)
+        self.report_failed_tracks()
+
+        artists = self.api_call_several('artists', [artist_id for _, artist_id, _ in pending_tracks], 
+                                        self.artist_batch_size)   # Access every artist once
+
+        audio_features = self.api_call_several('audio-features', [track_id for track_id, _, _ in pending_tracks], 
+                                               self.audio_features_batch_size)   # Access the audio features
+
+        self.store_track_data(pending_tracks, artists, audio_features)
+
+
+    def extract_page(self, page):
+        '''
+        This function will extract the tracks of a page that were not extracted before, and return a dictionary
+        with their features under their track id, and a list with the tracks that failed and the reason
+        The artists already requested in previous pages are taken from the cache
+        '''
+        if 'items' not in page:   # The page couldn't be requested
+            return {}, [{'track_id': None, 'reason': f"page call failed: {page.get('error')}"}]
+
+        failed_tracks = []
+
+        items = [track for track in page['items'] if (track.get('track') or {}).get('id') not in self.done_tracks]
+
+        pending_tracks = self.extract_pending_tracks([{'items': items}], failed_tracks)
+
+        failed_items = {}   # Artists and audio features that couldn't be requested
+
+        artists = self.api_call_several('artists', [artist_id for _, artist_id, _ in pending_tracks], 
+                                        self.artist_batch_size, failed_items)   # Access every artist once
+
+        audio_features = self.api_call_several('audio-features', [track_id for track_id, _, _ in pending_tracks], 
+                                               self.audio_features_batch_size, failed_items)   # Access the audio features
+
+        enriched_tracks = self.remove_failed_tracks(pending_tracks, failed_items, failed_tracks)
+
+        return dict(self.enrich_tracks(enriched_tracks, artists, audio_features)), failed_tracks
 
-        for loop in range(0,loops):   # This loop will iterate over the 100 tracks dictionaries in the list
-    
-            page = self.track_list[loop]   # We set our current dictionary
 
-            for self.track in page['items']:   # This loop will iterate over the tracks in the dictionary and get the information
+    def extract_pages(self):
+        '''
+        This function will extract the tracks page by page, store them, and save them with the failed tracks in the checkpoint
+        If a call can't be done after all the retries, the tracks of the page are stored as failed and the extraction goes on
+        The transports raise the connection errors as requests errors, also the ones of httpx
+        '''
+        for page in self.track_list:
 
-                self.all_track_features = {}   # Empty dictionary to store data of every individual track
+            try:
+                tracks, failed_tracks = self.extract_page(page)
+            except requests.RequestException as error:
+                tracks, failed_tracks = {}, [{'track_id': None, 'reason': repr(error)}]
 
-                self.define_track_id()   # Extract the track ID and create the dictionary key  
+            self.store_tracks(tracks)
+            self.failed_pages[page['offset']] = failed_tracks
 
-                self.store_playlist_data()   # Store playlist url and name
+            self.checkpoint.write(json.dumps({'offset': page['offset'], 'tracks': tracks, 'failed': failed_tracks}) + '\n')
+            self.checkpoint.flush()   # The page is saved even if the extraction is interrupted
 
-                self.extract_track_main_features()   # Extract the track main features, and store the artist id
 
-                self.api_call('artists', self.artist_id)   # Access the artist features using the artist id
+    def output_path(self, file_name):
+        '''
+        This function will return the path of the resulting file with the given name
+        '''
+        return self.output_folder + file_name + '.' + self.output_format   # Add the path information to the file name
 
-                self.extract_artist_features()   # Extract the artist main features
 
-                self.api_call('audio-features', self.track_id)   # Access the audio features using the track id
-                        
-                self.extract_track_audio_features()   # Extract the audio features
+    def open_writer(self, file_name, extra_columns=None):
+        '''
+        This function will create the writer of the output format, for the given file name
+        All the writers have the same methods: write, write_dict and close
+        With the normalized layout, the writer saves the tables next to the path, each one with the writer of the output format
+        '''
+        path = self.output_path(file_name)
+
+        if self.output_layout == 'normalized':
+            return Normalized_writer(path, self.writers[self.output_format], self.read_file, extra_columns, self.output_join_view)
+
+        return self.writers[self.output_format](path, extra_columns=extra_columns)
 
-                self.all_track_features['genre'] = self.playlist_genre   # Add the genre of the list to the dict 
 
-                self.dict_into_dict()   # Add the data into the nested dictionary, under the specific track id key
+    def read_rows(self, path):
+        '''
+        This function will read the resulting file saved in the given path, and return the track id and the
+        features of every row, in the order they were written
+        With the normalized layout the tables are joined, and every row also has the ids of its artist and album
+        '''
+        if self.output_layout == 'normalized':
+            return read_normalized(path, self.read_file)
 
-                sleep(0.1)
+        return self.read_file(path)
+
+
+    def read_file(self, path, key_column='track_id'):
+        '''
+        This function will read a file saved by a writer of the output format, and return the key (track id) and
+        the features of every row, in the order they were written
+        The values are read as they were written, so they are saved again without changes
+        '''
+        if self.output_format == 'parquet':
+            import pyarrow.parquet as pq   # Only loaded to read a parquet file
+
+            for batch in pq.ParquetFile(path).iter_batches():
+                for row in batch.to_pylist():
+                    yield row.pop(key_column), row
+        elif self.output_format == 'ndjson':
+            with open(path) as rows:
+                for line in rows:
+                    row = json.loads(line)
+                    yield row.pop(key_column), row
+        else:
+            import pandas as pd   # Only loaded to read a csv file
+
+            rows_df = pd.read_csv(path, index_col=0, dtype=str, keep_default_na=False)
+
+            yield from zip(rows_df.index, rows_df.to_dict(orient='records'))
+
+
+    def output_exists(self, path):
+        '''
+        This function will tell if the resulting file of the given path has been saved, or its tables with the normalized layout
+        '''
+        if self.output_layout == 'normalized':
+            return os.path.exists(table_path(path, 'tracks')) and os.path.exists(table_path(path, 'playlists'))
+
+        return os.path.exists(path)
+
+
+    def remove_output(self, path):
+        '''
+        This function will remove the resulting file of the given path, and its tables with the normalized layout
+        '''
+        paths = [path]
+
+        if self.output_layout == 'normalized':
+            paths += [table_path(path, table) for table in ['tracks', 'playlists'] + list(Entity_store.tables)]
+
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+    def open_output(self):
+        '''
+        This function will create the writer, so the tracks are added to the file as soon as they are extracted
+        '''
+        self.writer = self.open_writer(self.file_name)
+
+
+    def store_tracks(self, tracks):
+        '''
+        This function will add the extracted tracks to the writer
+        '''
+        self.writer.write_dict(tracks)
+        self.track_data.clear()   # Remove the keys created while extracting the page
+
+        self.done_tracks.update(tracks)
+
+
+    def close_output(self):
+        '''
+        This function will close the writer, saving the resulting file
+        '''
+        self.writer.close()
+
+
+    def save_ledger(self):
+        '''
+        This function will save the failed tracks and the reason in the ledger, so they can be retried with resume
+        If all the tracks have been extracted, the checkpoint and the ledger are removed
+        '''
+        self.checkpoint.close()
+
+        failed_tracks = [dict(failed_track, offset=offset) for offset, failed in self.failed_pages.items() for failed_track in failed]
+
+        if failed_tracks:
+            with open(self.ledger_path(), 'w') as ledger:
+                for failed_track in failed_tracks:
+                    ledger.write(json.dumps(failed_track) + '\n')
+
+            print(f'{len(failed_tracks)} tracks failed, they are listed in {self.ledger_path()}. '
+                  f'Run main.py --resume with the same file name to retry them')
+        else:
+            os.remove(self.checkpoint_path())
+
+            if os.path.exists(self.ledger_path()):
+                os.remove(self.ledger_path())
 
     
     def dict_into_dict(self):
@@ -236,16 +603,10 @@ class Extract_all():
         self.track_data[self.track_id] = self.all_track_features
 
     
-    def dict_to_df(self):
-        '''
-        This function will transform the resulting dictionary into a dataframe
-        '''
-        self.track_data_df = pd.DataFrame.from_dict(self.track_data, orient='index')
-
-
-    def df_to_csv(self):
+    def save_track_data(self, extra_columns=None):
         '''
-        This function will save the dataframe as a csv file
+        This function will save the resulting dictionary with the writer of the output format
         '''
-        path = '../../../genre_prediction/src/data/raw_data/individual_playlist/' + self.file_name + '.csv'   # Add the path information to the file name
-        self.track_data_df.to_csv(path)
\ No newline at end of file
+        writer = self.open_writer(self.file_name, extra_columns)
+        writer.write_dict(self.track_data)
+        writer.close()
@@ -0,0 +1,119 @@
+import asyncio
+from classes.cache import *
+from classes.extract_all import *
+from variables import *
+
+class Extract_async(Extract_all):
+    '''
+    This class extracts the same data as Extract_all, but all the calls to the API are done with asyncio
+    over a single aiohttp session. The session keeps a pool of open connections, so the TCP and TLS
+    handshakes are only done once per connection instead of once per call.
+    '''
+    connections_per_host = connections_per_host   # Maximum number of open connections to every host
+
+    def __init__(self):
+        '''
+        This function will initiate the class, ask for the playlist elements, extract all the data with
+        the async engine, store it in dictionaries, and save it as csv or parquet
+        '''
+        self.new_state()   # Create the lists and dictionaries of this extraction
+        self.get_playlist_data()
+        asyncio.run(self.run())   # Authenticate and extract all the data
+        self.save_track_data()   # Save the dictionary as a csv or parquet file
+
+
+    async def run(self):
+        '''
+        This function will open the shared session and run all the extraction steps with it
+        '''
+        import aiohttp   # Only loaded by the async engine
+
+        connector = aiohttp.TCPConnector(limit_per_host=self.connections_per_host)
+
+        async with aiohttp.ClientSession(connector=connector) as self.session:
+            self.headers = await self.get_headers_async()   # Get the authentification to access data
+            await self.get_all_tracks_async()   # Access each of the tracks of the playlist
+            await self.extract_all_data_async()   # Extract all the data which will be stored
+
+
+    async def get_headers_async(self):
+        '''
+        This function will return the personalised headers to get data from the API
+        The token is shared with the rest of the extractions, and it's only requested when it's about to expire
+        '''
+        return await self.transport.getHeadersAsync()
+
+
+    async def api_call_async(self, url_string, params=None):
+        '''
+        This function will do individual calls to the API through the shared session, and return the resulting dictionary
+        Every call waits for its turn in the shared rate limiter, and throttled calls are retried by the transport
+        '''
+        response = await self.transport.getAsync(self.session, url_string, params)
+
+        return response.json()
+
+
+    async def get_page_async(self, offset):
+        '''
+        This function will get the dictionary with the 100 tracks of the playlist starting at the given offset
+        '''
+        return await self.api_call_async('playlists/' + self.playlist_id + '/tracks',
+                                          {'offset':offset, 'limit':self.page_size, 'fields':self.page_fields})
+
+
+    async def get_all_tracks_async(self):
+        '''
+        This function will get a list of dictionaries, with all the tracks from the given playlist
+        All the remaining pages are requested at once, the connector limits how many are sent at the same time
+        '''
+        track_dict = await self.get_page_async(self.offset)   # Pull playlists tracks (first offset, 100)
+
+        self.track_list.append(track_dict)   # Add this dictionary to the track list
+
+        offsets = range(self.offset + self.page_size, track_dict['total'], self.page_size)   # Offsets of the remaining pages
+
+        for track_dict in await asyncio.gather(*[self.get_page_async(offset) for offset in offsets]):   # gather keeps the playlist order
+            self.track_list.append(track_dict)   # Add this dictionary to the track list
+
+
+    async def api_call_several_async(self, url_string, url_ids, batch_size, failed_items=None):
+        '''
+        This function will call a multi-id endpoint (artists, audio-features) with all the batches of ids at once,
+        and return a dictionary with every returned item stored under its id
+        Only the ids that are not in the cache are requested, and the ids that another extraction of the process
+        is already requesting are not sent again, their items are awaited
+        If a failed_items dictionary is given, the ids of the failed calls are stored in it with the reason
+        '''
+        items = item_cache.getMany(url_string, url_ids)   # Items stored in previous extractions
+
+        new_items, failed_batches = await self.transport.getSeveralAsync(self.session, url_string, [url_id for url_id in url_ids if url_id not in items],
+                                                                         batch_size, lambda batch_items: item_cache.setMany(url_string, batch_items))
+
+        if failed_items is not None:
+            self.store_failed_items(url_string, failed_batches, failed_items)
+
+        items.update(new_items)
+
+        return items
+
+
+    async def extract_all_data_async(self):
+        '''
+        This function will extract all the data of the tracks, requesting the artists and audio features concurrently
+        The tracks whose artist or audio features couldn't be requested are reported with the ones that couldn't be read
+        '''
+        pending_tracks = self.extract_pending_tracks(self.track_list, self.failed_tracks)
+
+        failed_items = {}   # Artists and audio features that couldn't be requested
+
+        artists, audio_features = await asyncio.gather(
+            self.api_call_several_async('artists', [artist_id for _, artist_id, _ in pending_tracks],
+                                        self.artist_batch_size, failed_items),   # Access every artist once
+            self.api_call_several_async('audio-features', [track_id for track_id, _, _ in pending_tracks],
+                                        self.audio_features_batch_size, failed_items))   # Access the audio features
+
+        pending_tracks = self.remove_failed_tracks(pending_tracks, failed_items, self.failed_tracks)
+        self.report_failed_tracks()
+
+        self.store_track_data(pending_tracks, artists, audio_features)
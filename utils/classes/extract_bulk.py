@@ -0,0 +1,186 @@
+import csv
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from classes.extract_all import *
+from variables import *
+
+class Bulk_playlist(Extract_all):
+    '''
+    This class keeps the data of one of the playlists of a bulk extraction. It uses the same methods as
+    Extract_all to get the pages and the main features of the tracks, but it doesn't ask for the
+    playlist elements and it doesn't extract anything when it's created.
+    '''
+    def __init__(self, playlist_name, playlist_genre, playlist_link):
+        self.playlist_name = playlist_name
+        self.playlist_genre = playlist_genre or 'undefined'
+        self.playlist_link = playlist_link
+        self.playlist_id = playlist_link.split("/")[-1].split("?")[0]
+
+        self.new_state()   # Pages and keys created while extracting the tracks of this playlist
+        self.pending_tracks = None   # Track id, artist id and main features of every track, once the playlist is listed
+
+
+    def list_tracks(self):
+        '''
+        This function will get all the pages of the playlist and extract the main features of their tracks
+        '''
+        self.api_response()   # Get the authentification to access data
+        self.get_all_tracks()   # Access each of the tracks of the playlist
+        self.pending_tracks = self.extract_pending_tracks(self.track_list, self.failed_tracks)
+        self.track_list = []   # The pages are not needed anymore
+
+
+class Extract_bulk(Extract_all):
+    '''
+    This class extracts all the playlists of a manifest, a csv file with the columns name, genre and url,
+    without asking anything, and saves them into a single file.
+        · The playlists are listed concurrently, bulk_workers at the same time
+        · The artists and audio features are requested once for all the playlists, so a track or an artist
+          that appears in several playlists is only requested once
+        · The resulting file has a row for every playlist and track, so it keeps which tracks are in every playlist
+        · Every listed playlist is saved in a state file, so if the extraction is interrupted, running it
+          again only lists the remaining playlists (the artists and audio features already requested are in the cache)
+        · The tracks that can't be read, or whose artist or audio features can't be requested, don't stop their
+          playlist, they are saved in a ledger with the reason
+    '''
+    bulk_workers = bulk_workers   # Playlists listed at the same time
+
+    def __init__(self, manifest_path, file_name):
+        '''
+        This function will initiate the class, given the manifest path and the name of the resulting file
+        '''
+        self.file_name = file_name
+        self.state_path = self.output_folder + self.file_name + '.state.jsonl'   # Playlists already listed
+        self.lock = threading.Lock()
+
+        self.read_manifest(manifest_path)   # Create a playlist for every row of the manifest
+        self.read_state()   # Recover the playlists listed in a previous run
+        self.list_playlists()   # List the remaining playlists
+        self.extract_all_data()   # Extract the artists and audio features of all the playlists
+        self.save_rows()   # Save the rows as a csv or parquet file
+        self.save_ledger()   # Save the tracks that couldn't be read
+        os.remove(self.state_path)   # The extraction has finished, the next one starts from scratch
+
+
+    def read_manifest(self, manifest_path):
+        '''
+        This function will read the manifest and create a playlist for every row
+        '''
+        with open(manifest_path, newline='') as manifest:
+            self.playlists = [Bulk_playlist(row['name'], row['genre'], row['url']) for row in csv.DictReader(manifest)]
+
+
+    def read_state(self):
+        '''
+        This function will recover the tracks of the playlists that were listed before the extraction was interrupted
+        '''
+        if not os.path.exists(self.state_path):
+            return
+
+        listed = {}
+
+        with open(self.state_path) as state:
+            for line in state:
+                try:
+                    playlist_state = json.loads(line)
+                except ValueError:   # The last line may be incomplete if the extraction was interrupted while writing it
+                    continue
+                listed[playlist_state['url']] = playlist_state
+
+        for playlist in self.playlists:
+            if playlist.playlist_link in listed:
+                playlist.pending_tracks = [tuple(track) for track in listed[playlist.playlist_link]['pending_tracks']]
+                playlist.failed_tracks = listed[playlist.playlist_link].get('failed_tracks', [])
+
+        print(f'Resuming: {len(listed)} playlists were already listed')
+
+
+    def list_playlist(self, playlist):
+        '''
+        This function will list a playlist and save its tracks in the state file
+        '''
+        try:
+            playlist.list_tracks()
+        except Exception as error:   # The playlist is not saved, it will be listed again in the next run
+            print(f'Could not list {playlist.playlist_name} ({playlist.playlist_link}): {error!r}')
+            return
+
+        with self.lock:
+            with open(self.state_path, 'a') as state:
+                state.write(json.dumps({'url': playlist.playlist_link, 'pending_tracks': playlist.pending_tracks,
+                                        'failed_tracks': playlist.failed_tracks}) + '\n')
+
+        print(f'{playlist.playlist_name}: {len(playlist.pending_tracks)} tracks')
+
+
+    def list_playlists(self):
+        '''
+        This function will list concurrently the playlists that were not listed in a previous run
+        '''
+        remaining = [playlist for playlist in self.playlists if playlist.pending_tracks is None]
+
+        with ThreadPoolExecutor(max_workers=self.bulk_workers) as executor:
+            list(executor.map(self.list_playlist, remaining))
+
+        self.playlists = [playlist for playlist in self.playlists if playlist.pending_tracks is not None]
+
+
+    def extract_all_data(self):
+        '''
+        This function will request the artists and audio features of all the playlists at once, and create a row
+        for every playlist and track
+        The tracks whose artist or audio features couldn't be requested are added to the failed tracks of their
+        playlist with the reason, instead of a row
+        '''
+        pending_tracks = [track for playlist in self.playlists for track in playlist.pending_tracks]
+
+        failed_items = {}   # Artists and audio features that couldn't be requested
+
+        artists = self.api_call_several('artists', [artist_id for _, artist_id, _ in pending_tracks],
+                                        self.artist_batch_size, failed_items)   # Access every artist once
+
+        audio_features = self.api_call_several('audio-features', [track_id for track_id, _, _ in pending_tracks],
+                                               self.audio_features_batch_size, failed_items)   # Access every track once
+
+        self.track_ids = []   # Index of the rows, the same track can be in several playlists
+        self.rows = []
+
+        for playlist in self.playlists:
+            enriched_tracks = playlist.remove_failed_tracks(playlist.pending_tracks, failed_items, playlist.failed_tracks)
+
+            for track_id, all_track_features in playlist.enrich_tracks(enriched_tracks, artists, audio_features):
+                self.track_ids.append(track_id)
+                self.rows.append(all_track_features)
+
+
+    def save_rows(self):
+        '''
+        This function will save the resulting rows with the writer of the output format
+        '''
+        writer = self.open_writer(self.file_name)
+
+        for track_id, all_track_features in zip(self.track_ids, self.rows):
+            writer.write(track_id, all_track_features)
+
+        writer.close()
+
+
+    def save_ledger(self):
+        '''
+        This function will save the tracks that couldn't be read or enriched in the ledger, with their playlist and the reason
+        If all the tracks have been read, the ledger of a previous run is removed
+        '''
+        failed_tracks = [dict(failed_track, playlist_link=playlist.playlist_link)
+                         for playlist in self.playlists for failed_track in playlist.failed_tracks]
+
+        if failed_tracks:
+            with open(self.ledger_path(), 'w') as ledger:
+                for failed_track in failed_tracks:
+                    ledger.write(json.dumps(failed_track) + '\n')
+
+            print(f'{len(failed_tracks)} tracks failed, they are listed in {self.ledger_path()}')
+
+        elif os.path.exists(self.ledger_path()):
+            os.remove(self.ledger_path())
@@ -0,0 +1,140 @@
+import json
+import os
+from classes.extract_all import *
+from variables import *
+
+class Extract_incremental(Extract_all):
+    '''
+    This class refreshes a dataset extracted before with the same file name, instead of extracting the whole
+    playlist again.
+        · The snapshot id of the playlist and the tracks of the last extraction are saved next to the dataset
+        · If the snapshot id hasn't changed, the playlist is not extracted at all
+        · Otherwise only the added tracks get their artist and audio features, the tracks that are not in the
+          playlist anymore are kept and marked as removed, and the result is merged into the dataset
+    The first extraction of a playlist is a complete one.
+    '''
+    extra_columns = ['added_at', 'removed']   # Columns added to the dataset, after the usual ones
+
+    page_fields = page_fields.replace('items(', 'items(added_at,', 1)   # The date every track was added is also needed
+
+    item_paths = {'added_at': ('added_at',), **track_paths}   # Date the track was added to the playlist, before the main features
+
+    def __init__(self):
+        '''
+        This function will initiate the class, asking for the playlist elements, and refresh the dataset
+        '''
+        self.get_playlist_data()
+        self.new_state()   # Pages of this extraction, and resulting dataset with the old and the new tracks
+
+        self.snapshot_path = self.output_folder + self.file_name + '.snapshot.json'   # Snapshot of the last extraction
+        self.dataset_path = self.output_folder + self.file_name + '.' + self.output_format   # Dataset of the last extraction
+
+        self.api_response()   # Create the authentification to access data
+        self.read_snapshot()   # Recover the snapshot id and tracks of the last extraction
+        self.get_snapshot_id()   # Get the current snapshot id of the playlist
+
+        if self.snapshot_id is not None and self.snapshot_id == self.last_snapshot_id:
+            print(f'{self.playlist_name} has not changed since the last extraction')
+            return
+
+        self.get_all_tracks()   # Access each of the tracks of the playlist
+        self.read_dataset()   # Recover the tracks of the last extraction
+        self.extract_new_data()   # Extract the added tracks and merge them with the old ones
+        self.save_dataset()   # Save the merged dataset
+        self.save_snapshot()   # Save the snapshot id and tracks for the next extraction
+
+
+    def read_snapshot(self):
+        '''
+        This function will read the snapshot id and the tracks (with the date they were added) of the last extraction
+        If there is no previous extraction of this playlist, everything will be extracted
+        '''
+        self.last_snapshot_id = None
+        self.last_tracks = {}
+
+        if not (os.path.exists(self.snapshot_path) and self.output_exists(self.dataset_path)):
+            return
+
+        with open(self.snapshot_path) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+
+        if snapshot['playlist_id'] == self.playlist_id:   # The file name could have been used for another playlist
+            self.last_snapshot_id = snapshot['snapshot_id']
+            self.last_tracks = snapshot['tracks']
+
+
+    def get_snapshot_id(self):
+        '''
+        This function will get the current snapshot id of the playlist, which changes every time the playlist is modified
+        '''
+        self.snapshot_id = self.api_get('playlists/' + self.playlist_id, {'fields': 'snapshot_id'}).json().get('snapshot_id')
+
+
+    def read_dataset(self):
+        '''
+        This function will read the tracks of the last extraction into a dictionary, under their track id
+        The values are read as they were written, so the old tracks are saved again without changes
+        '''
+        self.old_track_data = {}
+
+        if self.last_snapshot_id is None:
+            return
+
+        for track_id, row in self.read_rows(self.dataset_path):
+            self.old_track_data[track_id] = row
+
+
+    def extract_new_data(self):
+        '''
+        This function will extract the artist and audio features of the added tracks, and merge them with the old ones
+        A track is extracted again if it was not in the last extraction, or if it has been removed and added again since then
+        '''
+        pending_tracks = self.extract_pending_tracks(self.track_list, self.failed_tracks)
+        self.report_failed_tracks()
+        self.track_list = []   # The pages are not needed anymore
+
+        self.tracks = {track_id: all_track_features['added_at'] for track_id, _, all_track_features in pending_tracks}   # Current tracks
+
+        new_tracks = [(track_id, artist_id, all_track_features) for track_id, artist_id, all_track_features in pending_tracks
+                      if self.last_tracks.get(track_id) != all_track_features['added_at'] or track_id not in self.old_track_data]
+
+        artists = self.api_call_several('artists', [artist_id for _, artist_id, _ in new_tracks],
+                                        self.artist_batch_size)   # Access every artist once
+
+        audio_features = self.api_call_several('audio-features', [track_id for track_id, _, _ in new_tracks],
+                                               self.audio_features_batch_size)   # Access the audio features
+
+        self.store_track_data(new_tracks, artists, audio_features)
+
+        for track_id, _, all_track_features in new_tracks:
+            all_track_features['removed'] = False
+
+        for track_id in self.tracks:   # The keys were created in playlist order, the unchanged tracks keep their old data
+            if self.track_data[track_id] == {}:
+                self.track_data[track_id] = self.old_track_data[track_id]
+
+        removed = 0
+
+        for track_id, all_track_features in self.old_track_data.items():   # The removed tracks are kept at the end
+            if track_id not in self.tracks:
+                if track_id in self.last_tracks:
+                    all_track_features['removed'] = True
+                    removed += 1
+                self.track_data[track_id] = all_track_features
+
+        print(f'{self.playlist_name}: {len(new_tracks)} tracks added, {removed} removed')
+
+
+    def save_dataset(self):
+        '''
+        This function will save the merged dataset, replacing the old one
+        '''
+        self.save_track_data(self.extra_columns)
+
+
+    def save_snapshot(self):
+        '''
+        This function will save the snapshot id and the current tracks, to compare them in the next extraction
+        '''
+        with open(self.snapshot_path, 'w') as snapshot_file:
+            json.dump({'playlist_id': self.playlist_id, 'snapshot_id': self.snapshot_id, 'tracks': self.tracks}, snapshot_file)
@@ -0,0 +1,155 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from classes.extract_bulk import *
+from variables import *
+
+
+def start_shard(token, shards):
+    '''
+    This function will prepare a process of the sharded extraction: it uses the token of the main process, and only
+    a part of the rate limit, so all the processes together don't go over it
+    '''
+    token_manager.importToken(*token)
+    rate_limiter.share(shards)
+
+    Extract_bulk.output_join_view = False   # The shards are only read by the merge, which saves the join view
+
+
+def extract_shard(manifest_path, file_name):
+    '''
+    This function will extract the playlists of a shard manifest into the file of the shard
+    '''
+    Extract_bulk(manifest_path, file_name)
+
+    print(rate_limiter.report())   # Time spent waiting for the API by this shard
+
+
+class Extract_sharded(Extract_all):
+    '''
+    This class extracts all the playlists of a manifest, as Extract_bulk, but split between several processes, so
+    the JSON decoding and the flattening of the tracks can use several cores instead of one.
+    It's experimental, it's not faster than Extract_bulk in any configuration measured so far: with the stand-in
+    of the API, one shard ran at 0.8x and two shards at 0.3x of Extract_bulk. Every process starts its own
+    interpreter and only gets a part of the single rate limit of the API, so it can only help when the flattening,
+    not the API, is the limit, on a machine with several free cores. Use Extract_bulk for real extractions.
+        · The manifest is split into shard_workers slices, in the same order, and every process extracts its slice
+          into its own file with Extract_bulk, so every shard can be resumed as a bulk extraction
+        · All the processes use the token of the main process, the same cache file, and a part of the rate limit
+        · The files of the shards are merged into a single file, in the order of the manifest, without the repeated
+          rows (the same dedupe_columns values), and then removed
+    '''
+    shard_workers = shard_workers   # Processes of the extraction, None is one per core
+
+    dedupe_columns = dedupe_columns   # Columns that identify a row of the merged file
+
+    def __init__(self, manifest_path, file_name):
+        '''
+        This function will initiate the class, given the manifest path and the name of the resulting file
+        '''
+        self.file_name = file_name
+
+        self.split_manifest(manifest_path)   # Save the manifest of every shard
+        self.extract_shards()   # Extract the shards that are not finished, each one in its own process
+        self.merge_shards()   # Save the rows of all the shards into the resulting file
+        self.remove_shards()   # The files of the shards are not needed anymore
+
+
+    def shard_path(self, shard_name, extension):
+        '''
+        This function will return the path of a file of the given shard
+        '''
+        return self.output_folder + shard_name + extension
+
+
+    def split_manifest(self, manifest_path):
+        '''
+        This function will split the playlists of the manifest into consecutive slices, and save the manifest of every shard
+        A playlist that is several times in the manifest is only extracted once
+        '''
+        rows = []
+        urls = set()
+
+        with open(manifest_path, newline='') as manifest:
+            for row in csv.DictReader(manifest):
+                if row['url'] not in urls:   # Only the first row of every url is kept
+                    urls.add(row['url'])
+                    rows.append(row)
+
+        shards = max(1, min(self.shard_workers or os.cpu_count(), len(rows)))
+        size = -(-len(rows) // shards)   # Playlists of every shard, rounded up
+
+        self.shard_names = []
+
+        for shard in range(shards):
+            shard_name = f'{self.file_name}.shard-{shard}'
+
+            with open(self.shard_path(shard_name, '.manifest.csv'), 'w', newline='') as shard_manifest:
+                writer = csv.DictWriter(shard_manifest, fieldnames=['name', 'genre', 'url'], extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(rows[shard * size:(shard + 1) * size])
+
+            self.shard_names.append(shard_name)
+
+
+    def shard_done(self, shard_name):
+        '''
+        This function will tell if a shard was already extracted in a previous run: its file is saved and its bulk
+        extraction has removed the state file
+        '''
+        return (self.output_exists(self.output_path(shard_name)) and
+                not os.path.exists(self.shard_path(shard_name, '.state.jsonl')))
+
+
+    def extract_shards(self):
+        '''
+        This function will extract the remaining shards at the same time, each one in its own process
+        '''
+        remaining = [shard_name for shard_name in self.shard_names if not self.shard_done(shard_name)]
+
+        if not remaining:
+            return
+
+        token = token_manager.exportToken()   # The token is only requested once for all the processes
+
+        with ProcessPoolExecutor(max_workers=len(remaining), initializer=start_shard, initargs=(token, len(remaining))) as executor:
+            shards = [executor.submit(extract_shard, self.shard_path(shard_name, '.manifest.csv'), shard_name)
+                      for shard_name in remaining]
+
+            for shard in shards:
+                shard.result()   # An error of a shard stops the extraction, running it again resumes the shard
+
+
+    def merge_shards(self):
+        '''
+        This function will save the rows of all the shards into the resulting file, in the order of the manifest,
+        skipping the rows with the same dedupe_columns values as a previous one
+        '''
+        writer = self.open_writer(self.file_name)
+
+        keys = set()   # Values of the dedupe columns of the saved rows
+        repeated = 0
+
+        for shard_name in self.shard_names:
+            for track_id, all_track_features in self.read_rows(self.output_path(shard_name)):
+                key = tuple(track_id if column == 'track_id' else all_track_features.get(column) for column in self.dedupe_columns)
+
+                if key in keys:
+                    repeated += 1
+                    continue
+
+                keys.add(key)
+                writer.write(track_id, all_track_features)
+
+        writer.close()
+
+        print(f'{self.file_name}: {len(keys)} rows from {len(self.shard_names)} shards, {repeated} repeated rows removed')
+
+
+    def remove_shards(self):
+        '''
+        This function will remove the manifest and the file (or the tables) of every shard
+        '''
+        for shard_name in self.shard_names:
+            os.remove(self.shard_path(shard_name, '.manifest.csv'))
+            self.remove_output(self.output_path(shard_name))
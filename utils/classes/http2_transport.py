@@ -0,0 +1,8 @@
+from classes.credentials import *
+from classes.limiter import *
+from spotify_core.transport import *
+from variables import *
+
+# Transport shared by all the extractions of the process: the calls are multiplexed over HTTP/2 if httpx and h2
+# are installed, and the same calls in flight are coalesced
+http2_transport = Transport(BASE_URL, rate_limiter, token_manager, max_retries, http2, connections_per_host)
@@ -0,0 +1,4 @@
+from spotify_core.limiter import *
+from variables import *
+
+rate_limiter = RateLimiter(rate_limit, min_rate_limit, rate_burst, rate_increase, backoff_base, max_backoff)   # Limiter shared by all the extractions of the process
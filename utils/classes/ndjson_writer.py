@@ -0,0 +1,38 @@
+import json
+from variables import *
+
+class Ndjson_writer():
+    '''
+    This class writes the extracted tracks into a file with a line of JSON for every track, the same lines the
+    web app returns with format=ndjson. It has the same methods as Parquet_writer, and every track is written
+    as soon as it's added, so nothing is kept in memory.
+    '''
+    def __init__(self, path, extra_columns=None, columns=None, key_column='track_id'):
+        '''
+        This function will open the file. The keys of every line are the features of the track,
+        so the columns and extra columns don't need to be given
+        '''
+        self.file = open(path, 'w')
+        self.key_column = key_column   # Key of the track id (or the id of the row) in every line
+
+
+    def write(self, track_id, all_track_features):
+        '''
+        This function will add a track to the file
+        '''
+        self.file.write(json.dumps({self.key_column: track_id, **all_track_features}) + '\n')
+
+
+    def write_dict(self, track_data):
+        '''
+        This function will add all the tracks of a nested dictionary, stored under their track id
+        '''
+        for track_id, all_track_features in track_data.items():
+            self.write(track_id, all_track_features)
+
+
+    def close(self):
+        '''
+        This function will close the file
+        '''
+        self.file.close()
@@ -0,0 +1,140 @@
+import os
+from classes.entity_store import *
+from classes.parquet_writer import *
+from variables import *
+
+
+def table_path(path, table):
+    '''
+    This function will return the path of a table of the normalized dataset saved in the given path,
+    e.g. data/rock.csv has the tracks in data/rock.tracks.csv
+    '''
+    root, extension = os.path.splitext(path)
+
+    return root + '.' + table + extension
+
+
+def read_normalized(path, read_file):
+    '''
+    This function will join the tables of the normalized dataset saved in the given path, and return the track id
+    and the features of every row of the playlists table, with the columns of the flat files, the extra columns,
+    and the ids of the artist and the album. The artists and albums are taken from the entity store
+    read_file(path, key_column) reads a file of the output format
+    '''
+    tracks = dict(read_file(table_path(path, 'tracks')))
+
+    artists = entity_store.get_many('artists', [track['artist_id'] for track in tracks.values() if track['artist_id']])
+    albums = entity_store.get_many('albums', [track['album_id'] for track in tracks.values() if track['album_id']])
+
+    for track_id, playlist in read_file(table_path(path, 'playlists')):
+        track = tracks[track_id]
+        artist = artists.get(track['artist_id']) or {}
+        album = albums.get(track['album_id']) or {}
+
+        row = {column: playlist.get(column, track.get(column, artist.get(column, album.get(column))))
+               for column in Parquet_writer.columns}
+
+        for column, value in playlist.items():   # Extra columns of the playlists table
+            row.setdefault(column, value)
+
+        row['artist_id'] = track['artist_id']
+        row['album_id'] = track['album_id']
+
+        yield track_id, row
+
+
+class Normalized_writer():
+    '''
+    This class writes the extracted tracks into normalized tables, so the data of an artist, an album or a track is
+    saved once instead of in every row. It has the same methods as the other writers, and every table is saved
+    with the writer of the output format, next to the path of the dataset:
+        · tracks: the features of every track, with the ids of its artist and album
+        · artists and albums: every artist and album of the tracks, as kept in the entity store
+        · playlists: a row for every playlist and track, with the playlist elements and the extra columns
+    With join_view the flat file is also saved, joining the tables, with the same columns as before
+    '''
+    track_columns = ['track_name', 'track_popularity', 'artist_id', 'album_id'] + audio_features_list
+
+    playlist_columns = ['playlist_url', 'playlist_name', 'genre']
+
+    def __init__(self, path, writer, read_file, extra_columns=None, join_view=False):
+        '''
+        This function will open the tracks and playlists tables, with the given writer class of the output format
+        read_file(path, key_column) reads a file of the output format, to save the join view
+        '''
+        self.path = path
+        self.writer = writer
+        self.read_file = read_file
+        self.extra_columns = extra_columns or []
+        self.join_view = join_view
+
+        self.tracks = writer(table_path(path, 'tracks'), columns=self.track_columns, key_column='track_id')
+        self.playlists = writer(table_path(path, 'playlists'), extra_columns=extra_columns, columns=self.playlist_columns,
+                                key_column='track_id')
+
+        self.track_ids = set()   # Tracks already saved
+        self.entities = {kind: {} for kind in Entity_store.tables}   # Features of every artist and album, under their id
+
+
+    def write(self, track_id, all_track_features):
+        '''
+        This function will add a track to the tables: its features (only the first time), its artist and album,
+        and its playlist
+        '''
+        if track_id not in self.track_ids:
+            self.track_ids.add(track_id)
+            self.tracks.write(track_id, {column: all_track_features.get(column) for column in self.track_columns})
+
+        self.playlists.write(track_id, {column: all_track_features.get(column) for column in self.playlist_columns + self.extra_columns})
+
+        for kind, (id_column, columns) in Entity_store.tables.items():
+            entity_id = all_track_features.get(id_column)
+
+            if entity_id:
+                entity = self.entities[kind].setdefault(entity_id, {})
+                entity.update({column: all_track_features[column] for column in columns
+                               if all_track_features.get(column) is not None})   # The missing features don't replace the known ones
+
+
+    def write_dict(self, track_data):
+        '''
+        This function will add all the tracks of a nested dictionary, stored under their track id
+        '''
+        for track_id, all_track_features in track_data.items():
+            self.write(track_id, all_track_features)
+
+
+    def close(self):
+        '''
+        This function will close the tracks and playlists tables, store the artists and albums in the entity store,
+        and save their tables from it. With join_view, the flat file is saved too
+        '''
+        self.tracks.close()
+        self.playlists.close()
+
+        for kind, (id_column, columns) in Entity_store.tables.items():
+            entity_store.set_many(kind, self.entities[kind])
+            stored = entity_store.get_many(kind, list(self.entities[kind]))
+
+            table = self.writer(table_path(self.path, kind), columns=columns, key_column=id_column)
+
+            for entity_id in self.entities[kind]:
+                table.write(entity_id, stored.get(entity_id) or dict.fromkeys(columns))
+
+            table.close()
+
+        if self.join_view:
+            self.save_join_view()
+
+
+    def save_join_view(self):
+        '''
+        This function will save the flat file, with a row for every playlist and track and all their features
+        '''
+        view = self.writer(self.path, extra_columns=self.extra_columns)
+
+        for track_id, row in read_normalized(self.path, self.read_file):
+            del row['artist_id'], row['album_id']   # The ids are not in the flat files
+            view.write(track_id, row)
+
+        view.close()
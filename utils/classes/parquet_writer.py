@@ -0,0 +1,102 @@
+from variables import *
+
+class Parquet_writer():
+    '''
+    This class writes the extracted tracks into a Parquet file while they are extracted, instead of keeping
+    all of them in a dictionary and converting it into a dataframe at the end.
+    The tracks are kept in columns until row_group_size tracks have been added, and then they are written
+    as a row group, so the memory depends on the row group size and not on the size of the playlist.
+    '''
+    # Columns of the file, in the same order as the csv columns
+    columns = (['playlist_url', 'playlist_name', 'track_name', 'track_popularity', 'artist_name', 'album', 'album_cover', 
+                'artist_genres', 'artist_popularity'] + audio_features_list + ['genre'])
+
+    category_columns = ['playlist_name', 'genre']   # Repeated in every track, they are dictionary encoded
+
+    int_columns = ['track_popularity', 'artist_popularity', 'key', 'mode', 'duration_ms', 'time_signature']
+
+    float_columns = ['danceability', 'energy', 'loudness', 'speechiness', 'acousticness', 'instrumentalness', 
+                     'liveness', 'valence', 'tempo']
+
+    bool_columns = ['removed']
+
+    def __init__(self, path, row_group_size=row_group_size, extra_columns=None, columns=None, key_column='track_id'):
+        '''
+        This function will open the file and create the schema of the tracks
+        The extra columns are added after the csv columns, or after the given columns for the other tables
+        '''
+        import pyarrow as pa   # Only loaded when a parquet file is written
+        import pyarrow.parquet as pq
+
+        fields = [pa.field(key_column, pa.string())]
+
+        for column in (columns or self.columns) + (extra_columns or []):
+            if column in self.category_columns:
+                fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+            elif column in self.int_columns:
+                fields.append(pa.field(column, pa.int64()))
+            elif column in self.float_columns:
+                fields.append(pa.field(column, pa.float64()))
+            elif column in self.bool_columns:
+                fields.append(pa.field(column, pa.bool_()))
+            elif column == 'artist_genres':
+                fields.append(pa.field(column, pa.list_(pa.string())))
+            else:
+                fields.append(pa.field(column, pa.string()))
+
+        self.schema = pa.schema(fields)
+        self.row_group_size = row_group_size
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.rows = 0   # Number of tracks written
+
+        self.new_row_group()
+
+
+    def new_row_group(self):
+        '''
+        This function will create the empty lists of values of the next row group
+        '''
+        self.values = {field.name: [] for field in self.schema}
+        self.keys = self.values[self.schema[0].name]   # Track ids, or the ids of the rows of the table
+
+
+    def write(self, track_id, all_track_features):
+        '''
+        This function will add a track to the current row group, and write it if it's full
+        '''
+        self.keys.append(track_id)
+
+        for column, values in self.values.items():
+            if values is not self.keys:
+                values.append(all_track_features.get(column))   # Missing features are stored as null
+
+        if len(self.keys) >= self.row_group_size:
+            self.flush()
+
+
+    def write_dict(self, track_data):
+        '''
+        This function will add all the tracks of a nested dictionary, stored under their track id
+        '''
+        for track_id, all_track_features in track_data.items():
+            self.write(track_id, all_track_features)
+
+
+    def flush(self):
+        '''
+        This function will write the current row group into the file
+        '''
+        import pyarrow as pa
+
+        if self.keys:
+            self.writer.write_table(pa.Table.from_pydict(self.values, schema=self.schema))
+            self.rows += len(self.keys)
+            self.new_row_group()
+
+
+    def close(self):
+        '''
+        This function will write the last row group and close the file
+        '''
+        self.flush()
+        self.writer.close()
@@ -0,0 +1,7 @@
+from classes.credentials import *
+from classes.limiter import *
+from spotify_core.transport import *
+from variables import *
+
+# Transport that does the calls to the API with a requests session, even if httpx and h2 are installed
+requests_transport = Transport(BASE_URL, rate_limiter, token_manager, max_retries, False, connections_per_host)
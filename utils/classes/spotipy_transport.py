@@ -0,0 +1,61 @@
+from classes.credentials import *
+from classes.limiter import *
+from spotify_core.transport import *
+from variables import *
+
+class Spotipy_transport():
+    '''
+    This class does the calls to the API through spotipy, with the token shared by the other extractors.
+    spotipy retries the throttled calls by itself, so every call only waits for its turn in the shared rate limiter.
+    spotipy is only imported with the first call, so the other extractors don't load it.
+    The multi-id calls are coalesced by id, the same way as the other transports
+    '''
+    def __init__(self):
+        self.sp = None   # spotipy client, created with the first call
+        self.items = InFlightItems()   # Items of the multi-id calls being sent
+
+
+    def client(self):
+        '''
+        This function will return the spotipy client, creating it if it's the first call
+        '''
+        if self.sp is None:
+            import spotipy
+
+            self.sp = spotipy.Spotify(client_credentials_manager = token_manager)   # The token is shared with the other extractors
+            self.sp.prefix = BASE_URL   # Same base URL as the other transports
+
+        return self.sp
+
+
+    def get(self, url_string, params=None):
+        '''
+        This function will do a call to the API with the generic spotipy GET, and return the response
+        '''
+        import spotipy
+
+        sp = self.client()
+
+        rate_limiter.acquire()   # Wait until the call can be done
+
+        try:
+            response = ApiResponse(200, sp._get(url_string, **(params or {})))
+            rate_limiter.success()
+
+        except spotipy.SpotifyException as error:   # spotipy has already retried the throttled calls
+            response = ApiResponse(error.http_status, {'error': error.msg})
+
+        return response
+
+
+    def getSeveral(self, url_string, ids, batch_size, store=None):
+        '''
+        This function will request the items of the given ids from a multi-id endpoint, in batches of batch_size ids,
+        without sending the ids that another call is already requesting
+        It returns a dictionary with the items under their ids, and a list with the ids and the status code of the
+        calls that failed
+        '''
+        return self.items.getSeveral(url_string, ids, batch_size, lambda params: self.get(url_string, params), store)
+
+
+spotipy_transport = Spotipy_transport()   # Transport shared by all the spotipy extractions of the process
@@ -1,13 +1,53 @@
-from classes.extract_100 import *
-from classes.extract_all import *
+from classes.cache import *
+from classes.http2_transport import *
+from classes.limiter import *
 from variables import *
 
-# Import the os module
+# Import the os and sys modules
 import os
+import sys
 
-# Correct directory
-os.chdir('/Users/laurabarreda/Documents/The_Bridge/genre_prediction/SRC/utils') 
+# Sharded mode: python main.py --shards manifest.csv file_name, the manifest is extracted by several processes
+# It's experimental and slower than the bulk mode so far, the processes split the rate limit of the API
+sharded = sys.argv[1:2] == ['--shards']
+arguments = sys.argv[2:] if sharded else sys.argv[1:]
 
-Extract_all()   # Extract all the tracks
+# Bulk mode: python main.py manifest.csv file_name
+manifest_path = os.path.abspath(arguments[0]) if len(arguments) > 1 else None
 
-# Extract_100()   # Extract 100 tracks or less
\ No newline at end of file
+# Resume mode: python main.py --resume, continues the interrupted extraction of a file name
+resume = sys.argv[1:] == ['--resume']
+
+# Incremental mode: python main.py --incremental, only extracts the tracks added since the last extraction of a file name
+incremental = sys.argv[1:] == ['--incremental']
+
+# The processes of the sharded extraction import this file, only the main process runs the extraction
+if __name__ == '__main__':
+    # Correct directory
+    os.chdir('/Users/laurabarreda/Documents/The_Bridge/genre_prediction/SRC/utils') 
+
+    # Every extractor is only imported when it's used, so the CLI doesn't load the dependencies of the others
+    if manifest_path is not None and sharded:
+        from classes.extract_sharded import *
+        Extract_sharded(manifest_path, arguments[1])   # Extract all the playlists of the manifest with several processes
+    elif manifest_path is not None:
+        from classes.extract_bulk import *
+        Extract_bulk(manifest_path, arguments[1])   # Extract all the playlists of the manifest
+    elif incremental:
+        from classes.extract_incremental import *
+        Extract_incremental()   # Extract only the tracks added since the last extraction of the same file
+    else:
+        from classes.extract_all import *
+        Extract_all(resume=resume)   # Extract all the tracks
+
+    # from classes.extract_100 import *
+    # Extract_100()   # Extract 100 tracks or less
+
+    # from classes.extract_async import *
+    # Extract_async()   # Extract all the tracks with the async engine
+
+    print(rate_limiter.report())   # Time spent waiting for the API
+
+    print(item_cache.report())   # Calls saved by the cache
+
+    print(http2_transport.report())   # Calls saved by coalescing
\ No newline at end of file
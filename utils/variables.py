@@ -6,6 +6,65 @@ audio_features_list = ['danceability', 'energy', 'key', 'loudness', 'mode',
                        'speechiness', 'acousticness', 'instrumentalness', 'liveness',   # Audio features  
                        'valence', 'tempo', 'duration_ms', 'time_signature']  
 
+page_size = 100   # Maximum number of tracks returned in every playlist page
+
+# Fields of the playlist pages that are requested: the total, and in every item only the fields that are read,
+# so the albums, markets, urls... are not sent. is_local and type tell the local files and episodes apart
+page_fields = ('total,items(is_local,track(id,uri,type,is_local,' + ','.join(track_features_list) +
+               ',artists(uri,name),album(id,name,images(url))))')
+
+pagination_workers = 8   # Maximum number of playlist pages requested at the same time
+
+connections_per_host = 10   # Maximum number of open connections to every host, in the async engine and the HTTP/2 transport
+
+http2 = False   # Multiplex the calls to the API over HTTP/2, only if the httpx and h2 packages are installed
+               # It's off until the httpx client has been run against the API, the benchmarks only run over HTTP/1.1
+
+artist_batch_size = 50   # Maximum number of ids accepted by the artists endpoint
+
+audio_features_batch_size = 100   # Maximum number of ids accepted by the audio-features endpoint
+
+rate_limit = 20   # Maximum number of calls per second to the API
+
+min_rate_limit = 1   # The rate limiter never goes below this number of calls per second
+
+rate_burst = 20   # Number of calls that can be done at once after a quiet period
+
+rate_increase = 0.1   # Calls per second recovered after every successful call
+
+max_retries = 5   # Number of times a throttled call is repeated
+
+backoff_base = 1   # Seconds waited after the first throttled call, when the API doesn't send Retry-After
+
+max_backoff = 60   # Maximum number of seconds waited between retries
+
+cache_path = 'cache.sqlite'   # File where the artists and audio features are cached between extractions
+
+cache_ttl = {'artists': 7 * 24 * 3600,   # Seconds an artist is kept, its genres and popularity can change
+             'audio-features': 365 * 24 * 3600}   # Seconds the audio features are kept, they don't change
+
+cache_max_items = 1000000   # Maximum number of items in the cache, the least recently used are removed
+
+token_refresh_margin = 60   # Seconds before the token expires when a new one is requested
+
+output_folder = '../../../genre_prediction/src/data/raw_data/individual_playlist/'   # Folder of the resulting files
+
+output_format = 'csv'   # Format of the resulting files, 'csv', 'parquet' or 'ndjson'
+
+output_layout = 'flat'   # 'flat' saves a row with all the features of every track, 'normalized' saves separate track, artist, album and playlist tables
+
+output_join_view = False   # With the normalized layout, also save the flat file, joining the tables
+
+entity_path = 'entities.sqlite'   # File where the artists and albums of all the normalized datasets are kept
+
+row_group_size = 10000   # Tracks written at once into the parquet files
+
+bulk_workers = 4   # Playlists listed at the same time in the bulk extraction
+
+shard_workers = None   # Processes of the experimental sharded extraction, each one extracts a slice of the playlists. None is one per core
+
+dedupe_columns = ['track_id', 'playlist_url']   # Columns that identify a row of a merged dataset, the repeated rows are removed
+
 AUTH_URL = 'https://accounts.spotify.com/api/token'   # Authorisation URL
 
 BASE_URL = 'https://api.spotify.com/v1/'   # Base URL of all Spotify API endpoints
\ No newline at end of file